@@ -1,8 +1,6 @@
 from configparser import ConfigParser
 from algorithmBase import AlgorithmBase, AlgorithmConfigBase
-import math
-from random import random
-from copy import deepcopy
+import numpy as np
 
 
 class AISConfig(AlgorithmConfigBase):
@@ -22,142 +20,140 @@ class AISConfig(AlgorithmConfigBase):
         super().__init__(config)
 
 # Clonal Selection Algorithm (Artificial Immune System)
+# The antibodies are the rows of a matrix, with an affinity vector and a dirty mask
+# marking the rows whose affinity has to be (re)computed.
 
 
-class AISAntibody:
-    paratopes: list = []
-    affinity: float = None
-
-    def clone(self):
-        a = AISAntibody()
-        a.paratopes = self.paratopes.copy()
-        a.affinity = self.affinity
-        return a
+def normalize_affinity(affinity):
+    """scales the affinities to [0,1], all zeros when they are all equal"""
+    if affinity.size == 0:
+        return np.zeros_like(affinity)
+    min_affinity = affinity.min()
+    span = affinity.max() - min_affinity
+    if span <= 0:
+        return np.zeros_like(affinity)
+    return (affinity - min_affinity) / span
 
 
 class AIS(AlgorithmBase):
-    def __init__(self, config: AlgorithmConfigBase, image_file: str, output_folder: str, id: str):
-        super().__init__(config, image_file, output_folder, id)
-
-    def random_antibody_fcn(self):
-        antibody = AISAntibody()
-        antibody.paratopes = self.randomSolution()
-        antibody.affinity = None
-        return antibody
-
-    def calculate_affinity_fcn(self, antibodies):
-        for x in antibodies:
-            antibody: AISAntibody = x
-            antibody.affinity = -self.objectiveFunction(antibody.paratopes)
-
-    def clone_antibodies_fcn(self, antibodies, clone_rate):
-        clones = []
-        affinities = [x.affinity for x in antibodies]
-        max_affinity = max(affinities)
-        min_affinity = min(affinities)
-        for x in antibodies:
-            a: AISAntibody = x
-            n_clone = int(math.ceil(len(antibodies) * ((a.affinity -
-                          min_affinity)/(max_affinity-min_affinity)) * clone_rate))
-            clones += [a.clone() for _ in range(n_clone)]
-        #for c in clones:
-        #    c.affinity = 0
-        return clones
-
-    def mutation_fcn(self, clones, mutation_exp):
-        affinities = [x.affinity for x in clones]
-        max_affinity = max(affinities)
-        min_affinity = min(affinities)
-
-        for i in range(0, len(clones)):
-            a: AISAntibody = clones[i]
-            aff = ((a.affinity - min_affinity)/(max_affinity-min_affinity))
-            mutation_rate = math.exp(-aff * mutation_exp)
-            clones[i] = self.point_mutation(clones[i], mutation_rate)
-        return clones
-
-    def selection_fcn(self, antibodies):
-        return sorted(antibodies, key=lambda x: x.affinity, reverse=True)
-
-    def remove_antibodies(self, antibodies, max_antibodies):
-        antibodies = self.selection_fcn(antibodies)[:max_antibodies]
-        return antibodies
-
-    def point_mutation(self, clone, mutation_rate):
+    def __init__(self, config: AlgorithmConfigBase, image_file: str, output_folder: str, id: str, streams=None,
+                 image_helper=None):
+        super().__init__(config, image_file, output_folder, id, streams, image_helper)
+
+    def random_antibodies_fcn(self, n):
+        return self.randomBatch(n)
+
+    def calculate_affinity_fcn(self, antibodies, affinity, dirty):
+        """
+        Computes, as a batch, the affinity of the dirty antibodies only
+        :param antibodies: The antibody matrix
+        :param affinity: The affinity vector, updated in place
+        :param dirty: The dirty mask, cleared in place
+        """
+        idx = np.flatnonzero(dirty)
+        if len(idx) > 0:
+            values = self.evaluateBatch(list(antibodies[idx]))
+            affinity[idx] = -np.array(values)
+            dirty[idx] = False
+
+    def clone_antibodies_fcn(self, antibodies, affinity, clone_rate):
+        """
+        Clones each antibody proportionally to its normalized affinity,
+        one clone each when the affinities are all equal
+        :return: The clone matrix and the affinities inherited from the parents
+        """
+        if clone_rate > 0 and len(affinity) > 0 and affinity.min() == affinity.max():
+            n_clone = np.ones(len(affinity), dtype=np.int64)
+        else:
+            n_clone = np.ceil(len(antibodies) * normalize_affinity(affinity)
+                              * clone_rate).astype(np.int64)
+        return np.repeat(antibodies, n_clone, axis=0), np.repeat(affinity, n_clone)
+
+    def mutation_fcn(self, clones, affinity, mutation_exp):
+        """
+        Hypermutates the clones in place, each gene mutates with probability exp(-affinity*mutation_exp)
+        :return: The dirty mask of the clones, only the clones that actually changed have to be evaluated
+        """
+        if len(clones) == 0:
+            return np.zeros(0, dtype=bool)
+        mutation_rate = np.exp(-normalize_affinity(affinity) * mutation_exp)
+        if self.error_mutation is not None:
+            return self.error_mutation.pointMutationBatch(clones, mutation_rate)
+        return self.genome_helper.pointMutationBatch(clones, mutation_rate)
+
+    def remove_antibodies(self, antibodies, affinity, max_antibodies):
         """
-        Iterates over each clone's paratope and mutates it accordingly to the mutation rate
-        :param clone: The clone on which perform the mutation
-        :param mutation_rate: The mutation's occurrence rate
-        :return: The mutated clone
+        Keeps the max_antibodies antibodies with the highest affinity
+        :return: The surviving antibodies and affinities, sorted by decreasing affinity
         """
-        for i in range(0, len(clone.paratopes)):
-            if random() < mutation_rate:
-                clone.paratopes[i] = self.randomComponent()
-        return clone
+        if len(affinity) > max_antibodies:
+            keep = np.argpartition(-affinity, max_antibodies - 1)[:max_antibodies]
+        else:
+            keep = np.arange(len(affinity))
+        keep = keep[np.argsort(-affinity[keep], kind='stable')]
+        return antibodies[keep], affinity[keep]
 
     def executive(self):
 
         config: AISConfig = self.config
         self._beginExecution()
 
-        # Initialization of the variable contatining the index of the iteration and of the antibodies set
-        iteration = 0
-        antibodies = []
-        memoryset = []
-        best_antibody: AISAntibody = None
-
-        # Antibodies creation
-        for i in range(0, config.number_of_antibodies):
-            antibodies.append(self.random_antibody_fcn())
+        # Antibodies creation, all of them have to be evaluated
+        antibodies = self.random_antibodies_fcn(config.number_of_antibodies)
+        affinity = np.zeros(len(antibodies))
+        dirty = np.ones(len(antibodies), dtype=bool)
+        best_paratopes = None
+        best_affinity = None
 
         while self._isExecutable():
 
-            # Increment the iteration number
-            iteration += 1
-
-            # Calculate affinity for each antibody
-            self.calculate_affinity_fcn(antibodies)
+            # Calculate affinity for the new antibodies
+            self.calculate_affinity_fcn(antibodies, affinity, dirty)
 
             # Clonation
-            clones = self.clone_antibodies_fcn(
-                antibodies, config.clone_rate)
-
-            # Hypermutation
-            clones = self.mutation_fcn(clones, config.mutation_exp)
-
-            # Computes the clones' affinity
-            self.calculate_affinity_fcn(clones)
-
-            # Add the clones to the antibodies list
-            antibodies += clones
-
-            # This is needed in order to remove identical/unnecessary antibodies
-            antibodies = self.remove_antibodies(
-                antibodies, config.max_antibodies)
-
-            # Assignment of the best antibodies to the memory set
-            memoryset = antibodies[:config.mem_size]
-
-            if len(antibodies) - config.num_remove > 0:
-                for i in range(len(antibodies) - config.num_remove, len(antibodies)):
-                    antibodies[i] = self.random_antibody_fcn()
+            clones, clones_affinity = self.clone_antibodies_fcn(
+                antibodies, affinity, config.clone_rate)
+
+            # Hypermutation, then computes the affinity of the mutated clones
+            clones_dirty = self.mutation_fcn(
+                clones, clones_affinity, config.mutation_exp)
+            self.calculate_affinity_fcn(clones, clones_affinity, clones_dirty)
+
+            # Add the clones to the antibodies and keep the best ones
+            antibodies, affinity = self.remove_antibodies(
+                np.concatenate((antibodies, clones)),
+                np.concatenate((affinity, clones_affinity)),
+                config.max_antibodies)
+            dirty = np.zeros(len(antibodies), dtype=bool)
+
+            # The colours of the best antibody may be refitted in place
+            fitness, refitted = self._refitColours(antibodies[0], -affinity[0])
+            if refitted:
+                affinity[0] = -fitness
+
+            # The memory set is made of the best antibodies
+            mem_size = min(config.mem_size, len(antibodies))
+            memoryset = antibodies[:mem_size]
 
             fitness_improved = False
-            if best_antibody is None or memoryset[0].affinity > best_antibody.affinity:
-                best_antibody = memoryset[0].clone()
+            if best_affinity is None or affinity[0] > best_affinity:
+                best_paratopes = self.genome_helper.fromRow(memoryset[0])
+                best_affinity = affinity[0]
                 fitness_improved = True
 
+            # Replace the worst antibodies with new random ones
+            if config.num_remove > 0 and len(antibodies) - config.num_remove > 0:
+                antibodies[-config.num_remove:] = self.random_antibodies_fcn(
+                    config.num_remove)
+                dirty[-config.num_remove:] = True
+
             # Print the current best solution and its value
-            delta = 0
-            if self.config.save_image_each == -1 and fitness_improved:
-                delta = delta+self.saveImage(str(self.currentGen),
-                                             best_antibody.paratopes)
-            elif self.config.save_image_each >= 1 and self.currentGen % self.config.save_image_each == 0:
-                delta = delta+self.saveImage(str(self.currentGen),
-                                             best_antibody.paratopes)
-            self._updateExecution(-best_antibody.affinity,
-                                  best_antibody.paratopes,
+            delta = self._saveCheckpoint(best_paratopes,
+                                         -best_affinity,
+                                         fitness_improved)
+            self._updateExecution(-best_affinity,
+                                  best_paratopes,
                                   delta=delta)
 
         self._endExecution()
-        return best_antibody.paratopes
+        return best_paratopes
@@ -0,0 +1,116 @@
+from configparser import ConfigParser
+from algorithmBase import AlgorithmBase, AlgorithmConfigBase
+import numpy as np
+
+
+class CMAESConfig(AlgorithmConfigBase):
+    def __init__(self, config: ConfigParser):
+        # Offspring sampled and evaluated (as a batch) on each generation, 0 for 4+3*ln(n).
+        self.population_size = 0
+        # Initial step size, the genes are in [0,1].
+        self.cmaes_sigma = 0.2
+        # Learning rates of the diagonal covariance are multiplied by this factor.
+        self.cmaes_learning_scale = 1.0
+        super().__init__(config)
+
+
+# Separable CMA-ES (Ros and Hansen 2008): the covariance matrix is diagonal, so a generation
+# costs O(lambda*n) and the algorithm scales to genomes of thousands of genes. The population is
+# a matrix of float polygon data in [0,1], converted to the genome mode for the batch evaluation.
+# The samples out of [0,1] are clipped and the clipped steps are used in the update.
+
+
+class CMAES(AlgorithmBase):
+    def __init__(self, config: AlgorithmConfigBase, image_file: str, output_folder: str, id: str, streams=None,
+                 image_helper=None):
+        super().__init__(config, image_file, output_folder, id, streams, image_helper)
+
+    def executive(self):
+        config: CMAESConfig = self.config
+        genome_helper = self.genome_helper
+        rng = genome_helper.rng
+        n = self.num_of_params
+
+        # strategy parameters
+        lam = config.population_size if config.population_size > 0 else 4 + int(3 * np.log(n))
+        lam = max(lam, 2)
+        mu = lam // 2
+        weights = np.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+        weights = weights / weights.sum()
+        mueff = 1.0 / np.square(weights).sum()
+        cs = (mueff + 2) / (n + mueff + 5)
+        ds = 1 + 2 * max(0.0, np.sqrt((mueff - 1) / (n + 1)) - 1) + cs
+        cc = (4 + mueff / n) / (n + 4 + 2 * mueff / n)
+        # the learning rates of the separable variant are (n+2)/3 times larger
+        c1 = config.cmaes_learning_scale * (n + 2) / 3 * 2 / ((n + 1.3) ** 2 + mueff)
+        cmu = config.cmaes_learning_scale * (n + 2) / 3 * \
+            2 * (mueff - 2 + 1 / mueff) / ((n + 2) ** 2 + mueff)
+        c1 = min(c1, 1.0)
+        cmu = min(cmu, 1.0 - c1)
+
+        self._beginExecution()
+
+        # the mean starts at an initial solution drawn with init_strategy
+        best_solution = self.randomSolution()
+        best_value = self.objectiveFunction(best_solution)
+        mean = genome_helper.toUnit([best_solution])[0]
+        sigma = config.cmaes_sigma
+        variance = np.ones(n)
+        ps = np.zeros(n)
+        pc = np.zeros(n)
+        generation = 0
+        self._updateExecution(best_value, best_solution)
+
+        while self._isExecutable():
+            fitness_improved = False
+            active = genome_helper.activeParams
+            # expected norm of a standard normal vector over the active genes
+            chi = np.sqrt(active) * (1 - 1 / (4 * active) + 1 / (21 * active ** 2))
+
+            # sample the offspring, the genes of the inactive polygons stay at the mean
+            z = rng.standard_normal((lam, n))
+            z[:, active:] = 0
+            std = np.sqrt(variance)
+            x = genome_helper.fromUnit(mean + sigma * z * std)
+            values = np.array(self.evaluateBatch(list(x)))
+            y = (genome_helper.toUnit(x) - mean) / sigma
+            y[:, active:] = 0
+
+            order = np.argsort(values)
+            if values[order[0]] < best_value:
+                best_value = values[order[0]]
+                best_solution = genome_helper.fromRow(x[order[0]])
+                fitness_improved = True
+
+            # move the mean toward the weighted best mu steps
+            selected = y[order[:mu]]
+            yw = weights @ selected
+            mean = np.clip(mean + sigma * yw, 0.0, 1.0)
+
+            # evolution paths
+            generation += 1
+            ps = (1 - cs) * ps + np.sqrt(cs * (2 - cs) * mueff) * yw / std
+            hs = np.linalg.norm(ps) / np.sqrt(1 - (1 - cs) ** (2 * generation)) < (1.4 + 2 / (active + 1)) * chi
+            pc = (1 - cc) * pc + hs * np.sqrt(cc * (2 - cc) * mueff) * yw
+
+            # diagonal covariance and step size
+            variance = (1 - c1 - cmu) * variance + \
+                c1 * (np.square(pc) + (1 - hs) * cc * (2 - cc) * variance) + \
+                cmu * (weights @ np.square(selected))
+            sigma = sigma * np.exp((cs / ds) * (np.linalg.norm(ps) / chi - 1))
+
+            best_value, refitted = self._refitColours(best_solution, best_value)
+            fitness_improved = fitness_improved or refitted
+
+            delta = self._saveCheckpoint(best_solution,
+                                         best_value,
+                                         fitness_improved)
+            self._updateExecution(best_value,
+                                  best_solution,
+                                  values.max(),
+                                  values.mean(),
+                                  values.std(),
+                                  delta=delta)
+
+        self._endExecution()
+        return best_solution
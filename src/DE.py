@@ -0,0 +1,140 @@
+from configparser import ConfigParser
+from algorithmBase import AlgorithmBase, AlgorithmConfigBase
+import numpy as np
+
+DE_STRATEGY_RAND = "rand1"
+DE_STRATEGY_BEST = "best1"
+DE_STRATEGY_CURRENT_TO_BEST = "current_to_best1"
+
+
+class DEConfig(AlgorithmConfigBase):
+    def __init__(self, config: ConfigParser):
+        self.population_size = 50
+        # Differential weight.
+        self.de_f = 0.5
+        # Crossover rate, the probability that a gene comes from the mutant.
+        self.de_cr = 0.9
+        # Mutant vectors: "rand1", "best1" or "current_to_best1".
+        self.de_strategy = DE_STRATEGY_RAND
+        super().__init__(config)
+
+
+# Differential evolution with binomial crossover. The population is a matrix of float
+# polygon data in [0,1]: a generation builds all the trial vectors with a few array
+# operations, converts them to the genome mode and evaluates them as one batch.
+
+
+class DE(AlgorithmBase):
+    def __init__(self, config: AlgorithmConfigBase, image_file: str, output_folder: str, id: str, streams=None,
+                 image_helper=None):
+        super().__init__(config, image_file, output_folder, id, streams, image_helper)
+
+    def donors(self, size: int, k: int) -> np.ndarray:
+        """draws, for each of the size rows, k distinct other rows, shape (size, k)"""
+        keys = self.genome_helper.rng.random((size, size))
+        np.fill_diagonal(keys, np.inf)
+        return np.argpartition(keys, k, axis=1)[:, :k]
+
+    def mutants(self, population, fitness, f, strategy) -> np.ndarray:
+        size = len(population)
+        r = self.donors(size, 3)
+        if strategy == DE_STRATEGY_RAND:
+            base = population[r[:, 0]]
+        elif strategy == DE_STRATEGY_BEST:
+            base = population[np.argmin(fitness)][None, :]
+        elif strategy == DE_STRATEGY_CURRENT_TO_BEST:
+            base = population + f * (population[np.argmin(fitness)] - population)
+        else:
+            raise Exception("DE strategy not supported")
+        return base + f * (population[r[:, 1]] - population[r[:, 2]])
+
+    def crossover(self, population, mutants, cr) -> np.ndarray:
+        """binomial crossover restricted to the genes of the active polygons, at least one gene from the mutant"""
+        size = len(population)
+        active = self.genome_helper.activeParams
+        rng = self.genome_helper.rng
+        mask = rng.random(population.shape) < cr
+        mask[np.arange(size), rng.integers(0, active, size)] = True
+        mask[:, active:] = False
+        trial = np.where(mask, mutants, population)
+        # the genes out of [0,1] are moved halfway between the parent and the bound
+        trial = np.where(trial < 0, population / 2, trial)
+        return np.where(trial > 1, (population + 1) / 2, trial)
+
+    def activate(self, population, fitness, active: int):
+        """
+        draws again, in place, the genes of the polygons activated after the first active genes in
+        every row but the best one, and evaluates the rows again. The new polygons are transparent in
+        all the rows, so the difference vectors alone would never make them visible
+        :param active: the number of genes active before the growth
+        """
+        genome_helper = self.genome_helper
+        rows = np.flatnonzero(np.arange(len(population)) != np.argmin(fitness))
+        fresh = genome_helper.toUnit(genome_helper.randomBatch(len(rows)))
+        population[rows, active:genome_helper.activeParams] = fresh[:, active:genome_helper.activeParams]
+        fitness[rows] = self.evaluateBatch(list(genome_helper.fromUnit(population[rows])))
+
+    def executive(self):
+        config: DEConfig = self.config
+        genome_helper = self.genome_helper
+        size = max(config.population_size, 4)
+
+        self._beginExecution()
+
+        batch = self.randomBatch(size)
+        fitness = np.array(self.evaluateBatch(list(batch)))
+        population = genome_helper.toUnit(batch)
+        best = int(np.argmin(fitness))
+        best_solution = genome_helper.fromRow(batch[best])
+        best_value = fitness[best]
+        active = genome_helper.activeParams
+        self._updateExecution(best_value,
+                              best_solution,
+                              fitness.max(),
+                              fitness.mean(),
+                              fitness.std())
+
+        while self._isExecutable():
+            fitness_improved = False
+
+            trial = self.crossover(population,
+                                   self.mutants(population, fitness, config.de_f, config.de_strategy),
+                                   config.de_cr)
+            trial_batch = genome_helper.fromUnit(trial)
+            trial_fitness = np.array(self.evaluateBatch(list(trial_batch)))
+
+            # one-to-one survivor selection, ties go to the trial to drift on plateaus
+            replace = trial_fitness <= fitness
+            population[replace] = genome_helper.toUnit(trial_batch[replace])
+            fitness[replace] = trial_fitness[replace]
+
+            best = int(np.argmin(fitness))
+            if fitness[best] < best_value:
+                best_value = fitness[best]
+                best_solution = genome_helper.fromRow(trial_batch[best])
+                fitness_improved = True
+
+            best_value, refitted = self._refitColours(best_solution, best_value)
+            if refitted:
+                # the refitted colours join the population in place of the best row
+                fitness_improved = True
+                population[best] = genome_helper.toUnit([best_solution])[0]
+                fitness[best] = best_value
+
+            delta = self._saveCheckpoint(best_solution,
+                                         best_value,
+                                         fitness_improved)
+            self._updateExecution(best_value,
+                                  best_solution,
+                                  fitness.max(),
+                                  fitness.mean(),
+                                  fitness.std(),
+                                  delta=delta)
+
+            # progressive growth
+            if genome_helper.activeParams > active:
+                self.activate(population, fitness, active)
+                active = genome_helper.activeParams
+
+        self._endExecution()
+        return best_solution
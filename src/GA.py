@@ -1,11 +1,13 @@
 from algorithmBase import BOUNDS_HIGH, BOUNDS_LOW, AlgorithmBase, AlgorithmConfigBase
+from concurrent.futures import wait, FIRST_COMPLETED
 from configparser import ConfigParser
 from deap import base
 from deap import creator
 from deap import tools
-from deap import algorithms
 import numpy as np
-import random
+
+GA_REPLACEMENT_WORST = "worst"
+GA_REPLACEMENT_TOURNAMENT = "tournament"
 
 
 class GAConfig(AlgorithmConfigBase):
@@ -15,12 +17,18 @@ class GAConfig(AlgorithmConfigBase):
         self.prob_mutation = 0.5
         self.hall_of_fame_size = 20
         self.crowding_factor = 10.0  # crowding factor for crossover and mutation
+        # steady-state mode: each child replaces a member as soon as its evaluation completes
+        self.steady_state = False
+        self.steady_state_inflight = 0  # evaluations in flight, 0 for twice the workers
+        self.steady_state_replacement = GA_REPLACEMENT_WORST  # or "tournament"
+        self.steady_state_report_each = 0  # completions per statistics record, 0 for population_size
         super().__init__(config)
 
 
 class GA(AlgorithmBase):
-    def __init__(self, config: AlgorithmConfigBase, image_file: str, output_folder: str, id: str):
-        super().__init__(config, image_file, output_folder, id)
+    def __init__(self, config: AlgorithmConfigBase, image_file: str, output_folder: str, id: str, streams=None,
+                 image_helper=None):
+        super().__init__(config, image_file, output_folder, id, streams, image_helper)
 
     def __getToolbox(self, num_of_params, crowding_factor):
         toolbox = base.Toolbox()
@@ -28,8 +36,13 @@ class GA(AlgorithmBase):
         # define a single objective, minimizing fitness strategy:
         creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
 
-        # create the Individual class based on list:
-        creator.create("Individual", list, fitness=creator.FitnessMin)
+        if self.genome_helper.quantized:
+            # create the Individual class based on a uint16 numpy array:
+            creator.create("Individual", np.ndarray,
+                           fitness=creator.FitnessMin)
+        else:
+            # create the Individual class based on list:
+            creator.create("Individual", list, fitness=creator.FitnessMin)
 
         # create an operator that randomly returns a float in the desired range:
         toolbox.register("attrFloat", self.randomSolution)
@@ -42,24 +55,34 @@ class GA(AlgorithmBase):
 
         # create an operator that generates a list of individuals:
         toolbox.register("populationCreator",
-                         tools.initRepeat,
-                         list,
-                         toolbox.individualCreator)
+                         self.randomPopulation,
+                         container=creator.Individual)
 
         # fitness calculation
         toolbox.register("evaluate", self.objectiveFunction)
 
         # genetic operators:
-        toolbox.register("select", tools.selTournament, tournsize=2)
+        toolbox.register("select", self.genome_helper.selTournament, tournsize=2)
+
+        if self.genome_helper.quantized:
+            toolbox.register("mate", self.genome_helper.crossover)
+
+            toolbox.register("mutate",
+                             self.genome_helper.creepMutation if self.error_mutation is None
+                             else self.error_mutation.creepMutation,
+                             eta=crowding_factor,
+                             indpb=1.0/num_of_params)
+            return toolbox
 
         toolbox.register("mate",
-                         tools.cxSimulatedBinaryBounded,
+                         self.genome_helper.sbxCrossover,
                          low=BOUNDS_LOW,
                          up=BOUNDS_HIGH,
                          eta=crowding_factor)
 
         toolbox.register("mutate",
-                         tools.mutPolynomialBounded,
+                         self.genome_helper.polynomialMutation if self.error_mutation is None
+                         else self.error_mutation.polynomialMutation,
                          low=BOUNDS_LOW,
                          up=BOUNDS_HIGH,
                          eta=crowding_factor,
@@ -82,7 +105,11 @@ class GA(AlgorithmBase):
 
         toolbox = self.__getToolbox(self.num_of_params, config.crowding_factor)
         # define the hall-of-fame object:
-        halloffame = tools.HallOfFame(config.hall_of_fame_size)
+        if self.genome_helper.quantized:
+            halloffame = tools.HallOfFame(config.hall_of_fame_size,
+                                          similar=self.genome_helper.sameGenome)
+        else:
+            halloffame = tools.HallOfFame(config.hall_of_fame_size)
 
         self._beginExecution()
 
@@ -124,6 +151,9 @@ class GA(AlgorithmBase):
                               mean_solution,
                               std_solution)
 
+        if config.steady_state:
+            return self.__steadyState(config, toolbox, population, halloffame, best_fitness)
+
         # Begin the generational process
         while self._isExecutable():
 
@@ -131,7 +161,7 @@ class GA(AlgorithmBase):
             offspring = toolbox.select(population, len(population) - hof_size)
 
             # Vary the pool of individuals
-            offspring = algorithms.varAnd(
+            offspring = self.genome_helper.varAnd(
                 offspring, toolbox, cxpb, mutpb)
 
             # Evaluate the individuals with an invalid fitness
@@ -151,19 +181,20 @@ class GA(AlgorithmBase):
 
             current_fitness, current_solution, current_fitness_worse, current_fitness_mean, current_fitness_std = getCurrentBest(
                 population)
+            current_fitness, refitted = self._refitColours(
+                current_solution, current_fitness)
+            if refitted:
+                current_solution.fitness.values = current_fitness,
+                halloffame.update([current_solution])
             fitness_improved = False
             if current_fitness < best_fitness:
                 best_fitness = current_fitness
                 best_solution = current_solution
                 fitness_improved = True
 
-            delta = 0
-            if self.config.save_image_each == -1 and fitness_improved:
-                delta = delta+self.saveImage(str(self.currentGen),
-                                             best_solution)
-            elif self.config.save_image_each >= 1 and self.currentGen % self.config.save_image_each == 0:
-                delta = delta+self.saveImage(str(self.currentGen),
-                                             best_solution)
+            delta = self._saveCheckpoint(best_solution,
+                                         best_fitness,
+                                         fitness_improved)
 
             self._updateExecution(current_fitness,
                                   current_solution,
@@ -176,3 +207,83 @@ class GA(AlgorithmBase):
 
         best = halloffame.items[0]
         return best
+
+    def __steadyState(self, config: GAConfig, toolbox, population, halloffame, best_fitness):
+        """
+        Steady-state loop: a pool of children is always being evaluated, as soon as an evaluation
+        completes the child is inserted into the population and a new child is dispatched.
+        A statistics record (a "generation") is written every steady_state_report_each completions
+        """
+        if config.steady_state_replacement not in (GA_REPLACEMENT_WORST, GA_REPLACEMENT_TOURNAMENT):
+            raise Exception("Steady-state replacement not supported")
+        inflight = config.steady_state_inflight if config.steady_state_inflight > 0 \
+            else 2 * max(1, config.workers)
+        report_each = config.steady_state_report_each if config.steady_state_report_each > 0 \
+            else len(population)
+        fitness = np.array([ind.fitness.values[0] for ind in population])
+        rng = self.genome_helper.rng
+
+        def dispatch():
+            if rng.random() < config.prob_crossover:
+                child, other = map(toolbox.clone, toolbox.select(population, 2))
+                toolbox.mate(child, other)
+            else:
+                child = toolbox.clone(toolbox.select(population, 1)[0])
+            if rng.random() < config.prob_mutation:
+                toolbox.mutate(child)
+            del child.fitness.values
+            pending[self.submitEvaluation(child)] = child
+
+        def insert(child):
+            if config.steady_state_replacement == GA_REPLACEMENT_WORST:
+                idx = int(np.argmax(fitness))
+            else:
+                # inverse tournament: the worst of two random members leaves
+                a, b = rng.choice(len(population), 2, replace=False)
+                idx = a if fitness[a] > fitness[b] else b
+            population[idx] = child
+            fitness[idx] = child.fitness.values[0]
+
+        pending = {}
+        for _ in range(inflight):
+            dispatch()
+
+        while self._isExecutable():
+            completed = 0
+            while completed < report_each:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    child = pending.pop(future)
+                    child.fitness.values = future.result(),
+                    insert(child)
+                    halloffame.update([child])
+                    completed += 1
+                    dispatch()
+
+            idx = int(np.argmin(fitness))
+            current_solution = population[idx]
+            current_fitness, refitted = self._refitColours(
+                current_solution, fitness[idx])
+            if refitted:
+                current_solution.fitness.values = current_fitness,
+                fitness[idx] = current_fitness
+                halloffame.update([current_solution])
+            fitness_improved = False
+            if current_fitness < best_fitness:
+                best_fitness = current_fitness
+                fitness_improved = True
+
+            delta = self._saveCheckpoint(halloffame.items[0],
+                                         best_fitness,
+                                         fitness_improved)
+            self._updateExecution(current_fitness,
+                                  current_solution,
+                                  fitness.max(),
+                                  fitness.mean(),
+                                  fitness.std(),
+                                  delta=delta)
+
+        for future in pending:
+            future.cancel()
+        self._endExecution()
+        return halloffame.items[0]
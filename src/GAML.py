@@ -3,12 +3,12 @@ from algorithmBase import BOUNDS_HIGH, BOUNDS_LOW, AlgorithmBase, AlgorithmConfi
 from deap import base
 from deap import creator
 from deap import tools
-from deap import algorithms
 import numpy as np
-import random
 import os
+import glob
 
-from dynamicParamaters import DYNPRMS_PROBLEM_TYPE_MIN, DynamicParameters
+from dynamicParamaters import DYNPRMS_PROBLEM_TYPE_MIN, DynamicParameters, readDynamicLog, fitSchedule
+from surrogateHelper import SurrogateModel
 
 
 class GAMLConfig(AlgorithmConfigBase):
@@ -22,10 +22,34 @@ class GAMLConfig(AlgorithmConfigBase):
         self.dparm_crossover_init = 0.4
         self.dparm_crossover_factor = 0.2
         self.dparm_crossover_levels = 40
+        # population size and share of the offspring slots bred and evaluated on each generation,
+        # shrunk while the mean fitness improves and grown when it stagnates
+        self.dparm_population = False
+        self.dparm_population_min = 50
+        self.dparm_population_max = 400
+        self.dparm_population_factor = 0.5
+        self.dparm_population_levels = 100
+        self.dparm_offspring = False
+        self.dparm_offspring_init = 1.0
+        self.dparm_offspring_min = 0.2
+        self.dparm_offspring_factor = 0.5
+        self.dparm_offspring_levels = 40
         self.dparm_buffer = 100
         self.dparm_threshold = 0.5
+        self.dparm_log = False  # write dynamic_log.txt even when not verbose
+        # glob pattern of the dynamic_log.txt of previous runs: during the cold start the parameters
+        # follow the median of their adapted values instead of staying at their initial values
+        self.dparm_warm_start = ""
+        self.dparm_warm_generations = 0  # generations of the schedule, 0 for dparm_buffer
         self.hall_of_fame_size = 20
         self.crowding_factor = 10.0  # crowding factor for crossover and mutation
+        # surrogate pre-screening: only the most promising fraction of the offspring is rendered
+        self.surrogate = False
+        self.surrogate_fraction = 0.3
+        self.surrogate_features = 128
+        self.surrogate_capacity = 1000
+        self.surrogate_validate_each = 10  # generations between full exact evaluations
+        self.surrogate_min_accuracy = 0.3  # rank correlation required to screen
         super().__init__(config)
 
     def getDynamicParamsSetting(self):
@@ -46,12 +70,29 @@ class GAMLConfig(AlgorithmConfigBase):
             'levels': self.dparm_crossover_levels,
             'enable': self.dparm_crossover
         })
+        dynamicSetting.append({
+            'name': 'population',
+            'initial': self.population_size,
+            'range': [self.dparm_population_min, self.dparm_population_max],
+            'factor': self.dparm_population_factor,
+            'levels': self.dparm_population_levels,
+            'enable': self.dparm_population
+        })
+        dynamicSetting.append({
+            'name': 'offspring',
+            'initial': self.dparm_offspring_init,
+            'range': [self.dparm_offspring_min, 1.0],
+            'factor': self.dparm_offspring_factor,
+            'levels': self.dparm_offspring_levels,
+            'enable': self.dparm_offspring
+        })
         return dynamicSetting
 
 
 class GAML(AlgorithmBase):
-    def __init__(self, config: AlgorithmConfigBase, image_file: str, output_folder: str, id: str):
-        super().__init__(config, image_file, output_folder, id)
+    def __init__(self, config: AlgorithmConfigBase, image_file: str, output_folder: str, id: str, streams=None,
+                 image_helper=None):
+        super().__init__(config, image_file, output_folder, id, streams, image_helper)
 
     def __getToolbox(self, num_of_params, crowding_factor):
         toolbox = base.Toolbox()
@@ -59,8 +100,13 @@ class GAML(AlgorithmBase):
         # define a single objective, minimizing fitness strategy:
         creator.create("FitnessMin", base.Fitness, weights=(-1.0,))
 
-        # create the Individual class based on list:
-        creator.create("Individual", list, fitness=creator.FitnessMin)
+        if self.genome_helper.quantized:
+            # create the Individual class based on a uint16 numpy array:
+            creator.create("Individual", np.ndarray,
+                           fitness=creator.FitnessMin)
+        else:
+            # create the Individual class based on list:
+            creator.create("Individual", list, fitness=creator.FitnessMin)
 
         # create an operator that randomly returns a float in the desired range:
         toolbox.register("attrFloat", self.randomSolution)
@@ -73,30 +119,92 @@ class GAML(AlgorithmBase):
 
         # create an operator that generates a list of individuals:
         toolbox.register("populationCreator",
-                         tools.initRepeat,
-                         list,
-                         toolbox.individualCreator)
+                         self.randomPopulation,
+                         container=creator.Individual)
 
         # fitness calculation
         toolbox.register("evaluate", self.objectiveFunction)
 
         # genetic operators:
-        toolbox.register("select", tools.selTournament, tournsize=2)
+        toolbox.register("select", self.genome_helper.selTournament, tournsize=2)
+
+        if self.genome_helper.quantized:
+            toolbox.register("mate", self.genome_helper.crossover)
+
+            toolbox.register("mutate",
+                             self.genome_helper.creepMutation if self.error_mutation is None
+                             else self.error_mutation.creepMutation,
+                             eta=crowding_factor,
+                             indpb=1.0/num_of_params)
+            return toolbox
 
         toolbox.register("mate",
-                         tools.cxSimulatedBinaryBounded,
+                         self.genome_helper.sbxCrossover,
                          low=BOUNDS_LOW,
                          up=BOUNDS_HIGH,
                          eta=crowding_factor)
 
         toolbox.register("mutate",
-                         tools.mutPolynomialBounded,
+                         self.genome_helper.polynomialMutation if self.error_mutation is None
+                         else self.error_mutation.polynomialMutation,
                          low=BOUNDS_LOW,
                          up=BOUNDS_HIGH,
                          eta=crowding_factor,
                          indpb=1.0/num_of_params)
         return toolbox
 
+    def __getSurrogate(self, config: GAMLConfig):
+        if not config.surrogate:
+            return None
+        scale = self.genome_helper.upper if self.genome_helper.quantized else None
+        return SurrogateModel(self.num_of_params,
+                              features=config.surrogate_features,
+                              capacity=config.surrogate_capacity,
+                              scale=scale,
+                              seed=self.genome_helper.rng.integers(2**32))
+
+    def __screenOffspring(self, surrogate: SurrogateModel, offspring, invalid_ind, config: GAMLConfig):
+        """
+        predicts the fitness of the offspring to be evaluated and drops the least promising ones.
+        Every surrogate_validate_each generations (or until the surrogate is accurate enough)
+        nothing is dropped and the predictions are returned to validate the surrogate
+        :return: the offspring, the individuals to be evaluated and the predictions to validate (or None)
+        """
+        if not surrogate.ready or len(invalid_ind) == 0:
+            return offspring, invalid_ind, None
+
+        predicted = surrogate.predict(invalid_ind)
+        trusted = surrogate.accuracy is not None and surrogate.accuracy >= config.surrogate_min_accuracy
+        if not trusted or self.currentGen % config.surrogate_validate_each == 0:
+            return offspring, invalid_ind, predicted
+
+        n_exact = max(1, int(np.ceil(len(invalid_ind)*config.surrogate_fraction)))
+        promising = np.argsort(predicted)[:n_exact]
+        rejected = set(id(ind) for ind in invalid_ind)
+        invalid_ind = [invalid_ind[i] for i in sorted(promising)]
+        rejected.difference_update(id(ind) for ind in invalid_ind)
+        offspring = [ind for ind in offspring if id(ind) not in rejected]
+        return offspring, invalid_ind, None
+
+    def __warmSchedule(self, config: GAMLConfig):
+        """
+        fits the schedule of the dynamic parameters to the logs of previous runs matching dparm_warm_start,
+        they are read before the log of this run is overwritten
+        """
+        if config.dparm_warm_start == "":
+            return []
+        names = [setting['name'] for setting in config.getDynamicParamsSetting()]
+        logs = []
+        for path in sorted(glob.glob(config.dparm_warm_start)):
+            log = readDynamicLog(path, names)
+            if len(log) > 0:
+                logs.append(log)
+        length = config.dparm_warm_generations if config.dparm_warm_generations > 0 else config.dparm_buffer
+        schedule = fitSchedule(logs, length)
+        if config.verbose:
+            print("Dynamic parameters warm start: "+str(len(logs))+" logs, "+str(len(schedule))+" generations")
+        return schedule
+
     def executive(self):
         """This algorithm is similar to DEAP eaSimple() algorithm, with two additions:
         1. halloffame is used to implement an elitism mechanism. The individuals contained in the
@@ -106,25 +214,39 @@ class GAML(AlgorithmBase):
         each iteration, passing the current generation number and the current best individual as arguments
         """
         config: GAMLConfig = self.config
-        if config.verbose:
+        if config.verbose or config.dparm_log:
             log_file = os.path.join(self.output_folder, 'dynamic_log.txt')
         else:
             log_file = None
 
         toolbox = self.__getToolbox(self.num_of_params, config.crowding_factor)
         # define the hall-of-fame object:
-        halloffame = tools.HallOfFame(config.hall_of_fame_size)
+        if self.genome_helper.quantized:
+            halloffame = tools.HallOfFame(config.hall_of_fame_size,
+                                          similar=self.genome_helper.sameGenome)
+        else:
+            halloffame = tools.HallOfFame(config.hall_of_fame_size)
 
+        schedule = self.__warmSchedule(config)
         dynamicParms = DynamicParameters(
             buffer_size=config.dparm_buffer,
             setting=config.getDynamicParamsSetting(),
             problem_type=DYNPRMS_PROBLEM_TYPE_MIN,
             threshold=config.dparm_threshold,
             log_file=log_file)
+        dynamicParms.warmStart(schedule)
         cxpbFun = dynamicParms.getParameterFunction('cxpb')
         mutpbFun = dynamicParms.getParameterFunction('mutpb')
+        populationFun = dynamicParms.getParameterFunction('population')
+        offspringFun = dynamicParms.getParameterFunction('offspring')
         ngen = config.max_generation
 
+        surrogate = self.__getSurrogate(config)
+        surrogate_log = None
+        if surrogate is not None and config.verbose:
+            surrogate_log = open(os.path.join(
+                self.output_folder, 'surrogate_log.txt'), 'w')
+
         self._beginExecution()
 
         # create initial population (generation 0):
@@ -150,6 +272,10 @@ class GAML(AlgorithmBase):
         fitnesses = toolbox.map(toolbox.evaluate, invalid_ind)
         for ind, fit in zip(invalid_ind, fitnesses):
             ind.fitness.values = fit,
+        if surrogate is not None:
+            surrogate.add(invalid_ind, [ind.fitness.values[0]
+                                        for ind in invalid_ind])
+            surrogate.fit()
 
         if halloffame is None:
             raise ValueError("halloffame parameter must not be empty!")
@@ -168,19 +294,50 @@ class GAML(AlgorithmBase):
         # Begin the generational process
         while self._isExecutable():
 
+            # The slots of the next generation, besides the hall of fame, are shared between
+            # bred offspring and unchanged survivors, both sizes follow the dynamic parameters
+            slots = max(2, int(round(populationFun())) - hof_size)
+            bred = min(slots, max(2, int(round(offspringFun()*slots))))
+
             # Select the next generation individuals
-            offspring = toolbox.select(population, len(population) - hof_size)
+            offspring = toolbox.select(population, bred)
 
             # Vary the pool of individuals
-            offspring = algorithms.varAnd(
+            offspring = self.genome_helper.varAnd(
                 offspring, toolbox, cxpbFun(), mutpbFun())
 
-            # Evaluate the individuals with an invalid fitness
+            # Evaluate the individuals with an invalid fitness,
+            # the surrogate keeps only the most promising ones
             invalid_ind = [ind for ind in offspring if not ind.fitness.valid]
-            fitnesses = toolbox.map(toolbox.evaluate, invalid_ind)
+            if surrogate is not None:
+                offspring, invalid_ind, predicted = self.__screenOffspring(
+                    surrogate, offspring, invalid_ind, config)
+            fitnesses = list(toolbox.map(toolbox.evaluate, invalid_ind))
             for ind, fit in zip(invalid_ind, fitnesses):
                 ind.fitness.values = fit,
 
+            if surrogate is not None:
+                if predicted is not None:
+                    surrogate.validate(predicted, fitnesses)
+                surrogate.add(invalid_ind, fitnesses)
+                surrogate.fit()
+
+                # refill the offspring dropped by the surrogate with evaluated individuals
+                missing = bred - len(offspring)
+                if missing > 0:
+                    offspring.extend(map(toolbox.clone,
+                                         toolbox.select(offspring, missing)))
+
+                if surrogate_log is not None:
+                    surrogate_log.write(str(self.currentGen)+"\t"+str(len(invalid_ind)) +
+                                        "\t"+str(surrogate.accuracy)+"\n")
+                    surrogate_log.flush()
+
+            # fill the remaining slots with selected individuals, already evaluated:
+            if slots > bred:
+                offspring.extend(map(toolbox.clone,
+                                     toolbox.select(population, slots - bred)))
+
             # add the best back to population:
             offspring.extend(halloffame.items)
 
@@ -193,19 +350,22 @@ class GAML(AlgorithmBase):
             current_fitness, current_solution, current_fitness_worse, current_fitness_mean, current_fitness_std = getCurrentBest(
                 population)
             dynamicParms.register(current_fitness_mean)
+            self.setTelemetryParameters({'cxpb': cxpbFun(), 'mutpb': mutpbFun(),
+                                         'population': len(population), 'offspring': offspringFun()})
+            current_fitness, refitted = self._refitColours(
+                current_solution, current_fitness)
+            if refitted:
+                current_solution.fitness.values = current_fitness,
+                halloffame.update([current_solution])
             fitness_improved = False
             if current_fitness < best_fitness:
                 best_fitness = current_fitness
                 best_solution = current_solution
                 fitness_improved = True
 
-            delta = 0
-            if self.config.save_image_each == -1 and fitness_improved:
-                delta = delta+self.saveImage(str(self.currentGen),
-                                             best_solution)
-            elif self.config.save_image_each >= 1 and self.currentGen % self.config.save_image_each == 0:
-                delta = delta+self.saveImage(str(self.currentGen),
-                                             best_solution)
+            delta = self._saveCheckpoint(best_solution,
+                                         best_fitness,
+                                         fitness_improved)
             self._updateExecution(current_fitness,
                                   current_solution,
                                   current_fitness_worse,
@@ -214,6 +374,8 @@ class GAML(AlgorithmBase):
                                   delta=delta)
 
         self._endExecution()
+        if surrogate_log is not None:
+            surrogate_log.close()
 
         best = halloffame.items[0]
         return best
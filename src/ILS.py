@@ -1,7 +1,9 @@
 from configparser import ConfigParser
-import copy
 from algorithmBase import AlgorithmBase, AlgorithmConfigBase
-import random
+import numpy as np
+
+ILS_STRATEGY_BEST = "best"
+ILS_STRATEGY_FIRST = "first"
 
 
 class ILSConfig(AlgorithmConfigBase):
@@ -9,6 +11,13 @@ class ILSConfig(AlgorithmConfigBase):
         self.pertubation_factor = 0.1
         self.neighbor_size = 10
         self.hamming_distance = 1
+        # "best": the whole neighborhood is evaluated as a batch and the best neighbor is taken,
+        # "first": the neighborhood is evaluated in chunks of workers neighbors, stopping at the first improvement
+        self.neighbor_strategy = ILS_STRATEGY_BEST
+        # Grow the neighborhood when it does not improve and shrink it when it does.
+        self.adaptive_neighbor_size = False
+        self.neighbor_size_min = 2
+        self.neighbor_size_max = 100
         super().__init__(config)
 
 
@@ -17,20 +26,53 @@ BOUNDS_LOW, BOUNDS_HIGH = 0.0, 1.0  # boundaries for all dimensions
 
 
 class ILS(AlgorithmBase):
-    def __init__(self, config: AlgorithmConfigBase, image_file: str, output_folder: str, id: str):
-        super().__init__(config, image_file, output_folder, id)
+    def __init__(self, config: AlgorithmConfigBase, image_file: str, output_folder: str, id: str, streams=None,
+                 image_helper=None):
+        super().__init__(config, image_file, output_folder, id, streams, image_helper)
 
     def perturbation(self, elem, delta):
+        if self.error_mutation is not None:
+            return self.error_mutation.perturb(elem, delta)
+        if self.genome_helper.quantized:
+            return self.genome_helper.perturb(elem, delta)
         m = (BOUNDS_HIGH-BOUNDS_LOW)*delta
-        perturbed = [old+random.uniform(-m, m) for old in elem]
+        n = self.genome_helper.activeParams
+        perturbed = (np.asarray(elem[:n], np.float64) +
+                     self.genome_helper.rng.uniform(-m, m, n)).tolist() + list(elem[n:])
         return perturbed
 
-    def mutation(self, elem, n=1):
-        mutated = copy.copy(elem)
-        for _ in range(n):
-            idx = random.randint(0, self.num_of_params-1)
-            mutated[idx] = random.uniform(BOUNDS_LOW, BOUNDS_HIGH)
-        return mutated
+    def exploreNeighborhood(self, neighbors, fitness, strategy):
+        """
+        evaluates a batch of neighbors through the batch objective
+        :param neighbors: the neighbors, one per row
+        :param fitness: the fitness to improve
+        :param strategy: ILS_STRATEGY_BEST or ILS_STRATEGY_FIRST
+        :return: the index of the improving neighbor (or None) and its fitness
+        """
+        if strategy == ILS_STRATEGY_BEST:
+            values = np.array(self.evaluateBatch(list(neighbors)))
+            idx = int(np.argmin(values))
+            if values[idx] < fitness:
+                return idx, values[idx]
+            return None, fitness
+        elif strategy == ILS_STRATEGY_FIRST:
+            chunk = max(1, self.config.workers)
+            for start in range(0, len(neighbors), chunk):
+                values = self.evaluateBatch(list(neighbors[start:start+chunk]))
+                for i, value in enumerate(values):
+                    if value < fitness:
+                        return start+i, value
+            return None, fitness
+        else:
+            raise Exception("Strategy not supported")
+
+    def adaptNeighborSize(self, neighbor_size, improved):
+        config: ILSConfig = self.config
+        if improved:
+            neighbor_size = int(neighbor_size / 1.5)
+        else:
+            neighbor_size = int(np.ceil(neighbor_size * 1.5))
+        return min(max(neighbor_size, config.neighbor_size_min), config.neighbor_size_max)
 
     def executive(self):
         config: ILSConfig = self.config
@@ -42,20 +84,27 @@ class ILS(AlgorithmBase):
         best_fitness = self.objectiveFunction(best_solution)
         self._updateExecution(best_fitness, best_solution)
 
+        neighbor_size = config.neighbor_size
         while self._isExecutable():
 
             new_solution = self.perturbation(
                 best_solution, config.pertubation_factor)
             new_solution_fitness = self.objectiveFunction(new_solution)
 
-            for _ in range(config.neighbor_size):
-                close_solution = self.mutation(
-                    new_solution, config.hamming_distance)
-                close_solution_fitness = self.objectiveFunction(close_solution)
-
-                if close_solution_fitness < new_solution_fitness:
-                    new_solution_fitness = close_solution_fitness
-                    new_solution = close_solution
+            # generate the whole neighborhood as a single batch and explore it
+            neighborhood = self.genome_helper.neighborhood if self.error_mutation is None \
+                else self.error_mutation.neighborhood
+            neighbors = neighborhood(
+                new_solution, neighbor_size, config.hamming_distance)
+            idx, close_solution_fitness = self.exploreNeighborhood(
+                neighbors, new_solution_fitness, config.neighbor_strategy)
+            if idx is not None:
+                new_solution = self.genome_helper.fromRow(neighbors[idx])
+                new_solution_fitness = close_solution_fitness
+
+            if config.adaptive_neighbor_size:
+                neighbor_size = self.adaptNeighborSize(
+                    neighbor_size, idx is not None)
 
             fitness_improved = False
             if new_solution_fitness <= best_fitness:
@@ -63,13 +112,12 @@ class ILS(AlgorithmBase):
                 best_fitness = new_solution_fitness
                 fitness_improved = True
 
-            delta = 0
-            if self.config.save_image_each == -1 and fitness_improved:
-                delta = delta+self.saveImage(str(self.currentGen),
-                                             best_solution)
-            elif self.config.save_image_each >= 1 and self.currentGen % self.config.save_image_each == 0:
-                delta = delta+self.saveImage(str(self.currentGen),
-                                             best_solution)
+            best_fitness, refitted = self._refitColours(best_solution, best_fitness)
+            fitness_improved = fitness_improved or refitted
+
+            delta = self._saveCheckpoint(best_solution,
+                                         best_fitness,
+                                         fitness_improved)
             self._updateExecution(best_fitness,
                                   best_solution,
                                   delta=delta)
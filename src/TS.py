@@ -1,26 +1,61 @@
 from configparser import ConfigParser
 from algorithmBase import AlgorithmBase, AlgorithmConfigBase
-import random
+from collections import deque
+import numpy as np
 
 
 class TSConfig(AlgorithmConfigBase):
     def __init__(self, config: ConfigParser):
         self.pertubation_factor = 0.1
         self.tabu_list_size = 10
+        # The number of neighbors sampled and evaluated (as a batch) on each iteration.
+        self.candidate_size = 10
         super().__init__(config)
 
 
+class TabuMemory:
+    def __init__(self, size: int):
+        """
+        Initializes a FIFO tabu memory of genome fingerprints with O(1) membership
+        :param size: the maximum number of fingerprints kept
+        """
+        self.size = size
+        self.__queue = deque()
+        self.__keys = set()
+
+    def __len__(self):
+        return len(self.__queue)
+
+    def __contains__(self, key):
+        return key in self.__keys
+
+    def add(self, key):
+        if key in self.__keys:
+            return
+        self.__queue.append(key)
+        self.__keys.add(key)
+        while len(self.__queue) > self.size:
+            self.__keys.discard(self.__queue.popleft())
+
+
 # all parameter values are bound between 0 and 1, later to be expanded:
 BOUNDS_LOW, BOUNDS_HIGH = 0.0, 1.0  # boundaries for all dimensions
 
 
 class TS(AlgorithmBase):
-    def __init__(self, config: AlgorithmConfigBase, image_file: str, output_folder: str, id: str):
-        super().__init__(config, image_file, output_folder, id)
+    def __init__(self, config: AlgorithmConfigBase, image_file: str, output_folder: str, id: str, streams=None,
+                 image_helper=None):
+        super().__init__(config, image_file, output_folder, id, streams, image_helper)
 
     def perturbation(self, elem, delta):
+        if self.error_mutation is not None:
+            return self.error_mutation.perturb(elem, delta)
+        if self.genome_helper.quantized:
+            return self.genome_helper.perturb(elem, delta)
         m = (BOUNDS_HIGH-BOUNDS_LOW)*delta
-        perturbed = [old+random.uniform(-m, m) for old in elem]
+        n = self.genome_helper.activeParams
+        perturbed = (np.asarray(elem[:n], np.float64) +
+                     self.genome_helper.rng.uniform(-m, m, n)).tolist() + list(elem[n:])
         return perturbed
 
     def executive(self):
@@ -28,69 +63,63 @@ class TS(AlgorithmBase):
 
         self._beginExecution()
 
-        # Initialize the best solution and its value
-        best_solution = None
-        best_value = float('inf')
-
-        # Initialize the tabu list
-        tabu_list = []
+        # Initialize the tabu memory, solutions are identified by their quantized fingerprint
+        tabu_list = TabuMemory(config.tabu_list_size)
+        fingerprint = self.genome_helper.fingerprint
 
         # Initialize the current solution and its value
         current_solution = self.randomSolution()
         current_value = self.objectiveFunction(current_solution)
+        tabu_list.add(fingerprint(current_solution))
         self._updateExecution(current_value, current_solution)
 
+        # Initialize the best solution and its value
+        best_solution = current_solution
+        best_value = current_value
+
         # Iterate for the specified number of iterations
         while self._isExecutable():
             fitness_improved = False
 
+            # Sample the candidate list by perturbing the current solution and evaluate it as a batch
+            candidates = [self.perturbation(current_solution, config.pertubation_factor)
+                          for _ in range(config.candidate_size)]
+            values = np.array(self.evaluateBatch(candidates))
+
+            # Move to the best admissible candidate, even if it is worse than the current solution:
+            # a candidate is admissible if it is not tabu or if it improves the best solution (aspiration)
+            order = np.argsort(values)
+            chosen = order[0]
+            for i in order:
+                if values[i] < best_value or not fingerprint(candidates[i]) in tabu_list:
+                    chosen = i
+                    break
+
+            current_solution = candidates[chosen]
+            current_value = values[chosen]
+            tabu_list.add(fingerprint(current_solution))
+
             # If the current solution is better than the best solution, update the best solution
             if current_value < best_value:
                 best_solution = current_solution
                 best_value = current_value
                 fitness_improved = True
 
-            # Add the current solution to the tabu list
-            if not current_solution in tabu_list:
-                tabu_list.append(current_solution)
-
-            # Generate a new solution by perturbing the current solution
-            new_solution = self.perturbation(
-                current_solution, config.pertubation_factor)
-
-            # Evaluate the new solution
-            new_value = self.objectiveFunction(new_solution)
-
-            # If the new solution is better than the current solution, update the current solution
-            if new_value < current_value:
-                current_solution = new_solution
-                current_value = new_value
-            else:
-                # If the new solution is not better than the current solution, check if it is in the tabu list
-                if new_solution in tabu_list:
-                    # If it is, generate a new solution by perturbing the current solution
-                    current_solution = self.perturbation(
-                        current_solution, config.pertubation_factor)
-                    current_value = self.objectiveFunction(new_solution)
-                else:
-                    # If it is not, add the new solution to the tabu list
-                    tabu_list.append(new_solution)
-
-            # If the tabu list is full, remove the oldest solution from it
-            if len(tabu_list) > config.tabu_list_size:
-                for _ in range(len(tabu_list)-config.tabu_list_size):
-                    tabu_list.pop(0)
+            best_value, refitted = self._refitColours(best_solution, best_value)
+            if refitted:
+                fitness_improved = True
+                if best_solution is current_solution:
+                    current_value = best_value
 
             # Print the current best solution and its value
-            delta = 0
-            if self.config.save_image_each == -1 and fitness_improved:
-                delta = delta+self.saveImage(str(self.currentGen),
-                                             best_solution)
-            elif self.config.save_image_each >= 1 and self.currentGen % self.config.save_image_each == 0:
-                delta = delta+self.saveImage(str(self.currentGen),
-                                             best_solution)
+            delta = self._saveCheckpoint(best_solution,
+                                         best_value,
+                                         fitness_improved)
             self._updateExecution(best_value,
                                   best_solution,
+                                  values.max(),
+                                  values.mean(),
+                                  values.std(),
                                   delta=delta)
 
         self._endExecution()
@@ -1,11 +1,17 @@
 from configparser import ConfigParser
 import os
-import random
 import time
 import json
 import numpy as np
 from imageHelper import ImageHelper
+from genomeHelper import GenomeHelper, GENOME_MODE_FLOAT
+from initializationHelper import InitializationHelper, INIT_STRATEGY_UNIFORM
+from mutationHelper import ErrorGuidedMutation
+from evaluationHelper import EvaluationHelper
+from trajectoryHelper import TrajectoryWriter
 from statisticHelper import StatisticHelper
+from rngHelper import RandomStreams
+from telemetryHelper import TelemetryServer
 
 # all parameter values are bound between 0 and 1, later to be expanded:
 BOUNDS_LOW, BOUNDS_HIGH = 0.0, 1.0  # boundaries for all dimensions
@@ -16,10 +22,42 @@ class AlgorithmConfigBase:
         self.polygon_size = 3
         self.number_of_polygon = 100
         self.save_image_each = 1000
+        self.save_artifacts = True  # png, bmp and txt files of each saved solution
+        self.save_trajectory = False  # binary trajectory.bin of the saved solutions
         self.max_generation = 1000
         self.max_time = -1
         self.verbose = False
         self.objective_fun_method = "MSE"  # or SSIM
+        self.fast_render = False  # fused render-and-score kernel for MSE and LOSS
+        self.mask_cache_size = 0  # polygon coverage masks cached by the fast renderer
+        self.reference_cache = ""  # folder of the on-disk cache of the decoded reference images
+        self.genome_mode = GENOME_MODE_FLOAT  # or "int" for uint16 quantized genomes
+        self.init_strategy = INIT_STRATEGY_UNIFORM  # or "lhs", "sobol", "reference"
+        self.init_size_min = 0.1  # half extent of the polygons placed by the "reference" strategy
+        self.init_size_max = 0.5
+        self.error_guided = False  # bias the mutations toward the high-error regions of the best solution
+        self.error_map_cell = 8  # side in pixels of a cell of the error map
+        self.error_map_uniform = 0.2  # share of the mutation probabilities kept uniform
+        self.growth_initial_polygons = 0  # progressive growth from this many polygons, 0 to start with all
+        self.growth_step = 1  # polygons activated when the improvement stalls
+        self.growth_patience = 20  # generations without improvement before a growth step
+        self.growth_min_improvement = 0.001  # relative improvement that resets the patience
+        self.colour_refit_each = -1  # least-squares colour refit of the best solution every N generations
+        self.colour_refit_sweeps = 2
+        self.workers = 1  # processes used to evaluate batches of solutions
+        self.log_metrics = ""  # comma separated metrics of the best solution added to the statistics
+        self.log_metrics_each = 1
+        self.schedule_total_time = -1  # multi-image successive halving when > 0, see BudgetScheduler
+        self.schedule_initial_time = 10
+        self.schedule_eta = 2.0
+        self.schedule_min_improvement = 0.001
+        self.tile_rows = 1  # tiled mode when tile_rows*tile_cols > 1, see TileSolver
+        self.tile_cols = 1
+        self.tile_overlap = 0.1  # fraction of the tile size shared with the neighbouring tiles
+        self.tile_workers = 0  # processes solving the tiles, 0 means one per core
+        self.tile_refine_generations = 0  # global refinement of the stitched solution
+        self.profile = False  # peak RSS column in the statistics, set by main.py --profile
+        self.telemetry = ""  # Prometheus metrics served on "port", "host:port" or "unix:/path"
         self.target_solution = -1.0
         self.update(config)
 
@@ -48,21 +86,43 @@ class AlgorithmConfigBase:
                 typev = type(self.__getattribute__(name))
                 strv = getValue(name)
                 if strv != None:
-                    v = typev(strv)
+                    if typev == bool:
+                        v = strv.strip().lower() in ("1", "true", "yes", "on")
+                    else:
+                        v = typev(strv)
                     self.__setattr__(name, v)
 
 
 class AlgorithmBase:
-    def __init__(self, config: AlgorithmConfigBase, image_file: str, output_folder: str, id: str):
+    def __init__(self, config: AlgorithmConfigBase, image_file: str, output_folder: str, id: str,
+                 streams: RandomStreams = None, image_helper: ImageHelper = None):
+        """
+        :param streams: the random streams of the run, all the operators draw from them.
+        By default they are seeded from the random module
+        :param image_helper: the image helper of a previous run on the same image file, with the same
+        polygon_size and mask_cache_size, reused with its decoded reference and caches
+        """
         self.config = config
         self.image_file = image_file
         self.output_folder = output_folder
         self.id = id
         self.__statistic = None
+        self.__last_statistic = None
+        self.__budget_controller = None
+        self.__trajectory = None
+        self.__growth_fitness = None
+        self.__growth_stall = 0
+        self.__seed_solutions = []
+        self.__telemetry = None
+        self.__telemetry_parameters = {}
+        self.__evaluations = 0
+        self.__phase_times = {}
 
         # create the image test class instance:
-        self.image_helper = ImageHelper(
-            self.image_file, config.polygon_size)
+        if image_helper is None:
+            image_helper = ImageHelper(
+                self.image_file, config.polygon_size, config.mask_cache_size, config.reference_cache or None)
+        self.image_helper = image_helper
 
         # calculate total number of params in chromosome:
         # For each polygon we have:
@@ -70,9 +130,41 @@ class AlgorithmBase:
         self.num_of_params = config.number_of_polygon * \
             (config.polygon_size * 2 + 4)
 
+        # genome representation and its vectorized operators:
+        self.streams = streams if streams is not None else RandomStreams.fromGlobal()
+        self.genome_helper = GenomeHelper(self.image_helper.width,
+                                          self.image_helper.height,
+                                          config.polygon_size,
+                                          config.number_of_polygon,
+                                          config.genome_mode,
+                                          self.streams.generator)
+        self.initialization_helper = InitializationHelper(self.genome_helper,
+                                                          self.image_helper.refArray,
+                                                          config.init_strategy,
+                                                          config.init_size_min,
+                                                          config.init_size_max,
+                                                          lambda: self.image_helper.integralImage)
+        self.error_mutation = None
+        if config.error_guided:
+            self.error_mutation = ErrorGuidedMutation(self.image_helper.renderHelper,
+                                                      self.genome_helper,
+                                                      config.error_map_cell,
+                                                      config.error_map_uniform)
+
         # fitness calculation using MSE as difference metric:
-        self.objectiveFunction = self.image_helper.getDifferenceFunc(
-            self.config.objective_fun_method)
+        self.__difference = self.image_helper.getDifferenceFunc(
+            self.config.objective_fun_method, self.config.fast_render)
+        self.objectiveFunction = self.__activeObjective
+
+        # batch evaluation, parallel when more than one worker is configured:
+        self.evaluation_helper = EvaluationHelper(self.objectiveFunction,
+                                                  config.workers,
+                                                  self.image_file,
+                                                  config.polygon_size,
+                                                  config.objective_fun_method,
+                                                  config.fast_render,
+                                                  config.mask_cache_size,
+                                                  config.reference_cache)
 
         # save inputs parameters
         input_file_path = os.path.join(self.output_folder, "inputs.txt")
@@ -87,54 +179,331 @@ class AlgorithmBase:
     def isRunning(self):
         return self.__statistic is not None
 
-    def randomSolution(self, low=BOUNDS_LOW, up=BOUNDS_HIGH):
-        # helper function for creating random real numbers uniformly distributed within a given range [low, up]
-        # it assumes that the range is the same for every dimension
-        return [random.uniform(l, u) for l, u in zip([low] * self.num_of_params, [up] * self.num_of_params)]
+    @property
+    def currentFitness(self):
+        statistic = self.__statistic or self.__last_statistic
+        return statistic.currentFitness if statistic is not None else None
+
+    @property
+    def elapsedTime(self):
+        """the execution time of the current (or last) run"""
+        statistic = self.__statistic or self.__last_statistic
+        return statistic.offtenTime if statistic is not None else 0
+
+    @property
+    def fitnessHistory(self):
+        """the execution times and fitness of the records of the current (or last) run"""
+        statistic = self.__statistic or self.__last_statistic
+        return statistic.history if statistic is not None else ([], [])
+
+    def relativeImprovement(self, since_time: float):
+        statistic = self.__statistic or self.__last_statistic
+        return statistic.relativeImprovement(since_time) if statistic is not None else 1.0
+
+    def setBudgetController(self, controller):
+        """the controller is asked, on each iteration, whether the time budget allows to continue"""
+        self.__budget_controller = controller
+
+    def seedSolutions(self, solutions):
+        """
+        the next solutions created by randomSolution and randomBatch are the given ones,
+        random solutions are drawn once they are used up
+        :param solutions: a list of genomes in the current genome mode
+        """
+        self.__seed_solutions = list(solutions)
+
+    def randomSolution(self):
+        """returns an initial solution drawn with the init_strategy"""
+        if len(self.__seed_solutions) > 0:
+            return self.__seed_solutions.pop(0)
+        return self.genome_helper.fromRow(self.randomBatch(1)[0])
+
+    def randomPopulation(self, n, container=list):
+        """returns n initial solutions, drawn together so that lhs and sobol cover the space"""
+        return [container(self.genome_helper.fromRow(row)) for row in self.randomBatch(n)]
+
+    def randomBatch(self, n):
+        """returns n initial solutions as the rows of a matrix"""
+        batch = self.initialization_helper.batch(n)
+        self.genome_helper.hideInactive(batch)
+        seeds = min(n, len(self.__seed_solutions))
+        for i in range(seeds):
+            batch[i] = self.__seed_solutions.pop(0)
+        return batch
 
     def randomComponent(self, low=BOUNDS_LOW, up=BOUNDS_HIGH):
-        return random.uniform(low, up)
+        return self.genome_helper.rng.uniform(low, up)
 
-    def saveImage(self, name: str, polygonData: any, header=None):
+    def activeGenome(self, solution):
+        """
+        returns the genes of the active polygons only. The inactive polygons are transparent,
+        so the image is the same and the renderer skips them
+        """
+        if self.genome_helper.activePolygons == self.genome_helper.numberOfPolygon:
+            return solution
+        return solution[:self.genome_helper.activeParams]
+
+    def __activeObjective(self, polygonData):
+        if self.__telemetry is None:
+            return self.__difference(self.activeGenome(polygonData))
+        st = time.time()
+        value = self.__difference(self.activeGenome(polygonData))
+        self.__countEvaluations(1, time.time()-st)
+        return value
+
+    def __countEvaluations(self, n: int, seconds: float):
+        self.__evaluations += n
+        self.__phase_times["evaluation"] += seconds
+
+    def _growPolygons(self, fitness: float):
+        """
+        activates growth_step more polygons when the fitness did not improve by growth_min_improvement
+        for growth_patience generations. The new polygons are transparent, so no fitness changes
+        """
+        genome_helper = self.genome_helper
+        if genome_helper.activePolygons >= genome_helper.numberOfPolygon:
+            return
+        if self.__growth_fitness is None or \
+                fitness < self.__growth_fitness - abs(self.__growth_fitness) * self.config.growth_min_improvement:
+            self.__growth_fitness = fitness
+            self.__growth_stall = 0
+            return
+        self.__growth_stall += 1
+        if self.__growth_stall >= self.config.growth_patience:
+            genome_helper.activePolygons = min(genome_helper.activePolygons + self.config.growth_step,
+                                               genome_helper.numberOfPolygon)
+            self.__growth_fitness = fitness
+            self.__growth_stall = 0
+            if self.config.verbose:
+                print("Active polygons: "+str(genome_helper.activePolygons))
+
+    def evaluateBatch(self, solutions) -> list:
+        """evaluates a list of solutions, in parallel when workers > 1"""
+        if self.__telemetry is None or not self.evaluation_helper.isDistributed(len(solutions)):
+            return self.evaluation_helper.map([self.activeGenome(s) for s in solutions])
         st = time.time()
+        values = self.evaluation_helper.map([self.activeGenome(s) for s in solutions])
+        self.__countEvaluations(len(values), time.time()-st)
+        return values
+
+    def submitEvaluation(self, solution):
+        """starts the evaluation of a solution, see EvaluationHelper.submit"""
+        if self.__telemetry is not None and self.evaluation_helper.isParallel:
+            # the evaluation time is spent in the workers
+            self.__countEvaluations(1, 0)
+        return self.evaluation_helper.submit(self.activeGenome(solution))
+
+    def setTelemetryParameters(self, parameters: dict):
+        """the current values of the dynamic parameters, published with the next generation"""
+        self.__telemetry_parameters = parameters
+
+    @property
+    def logMetrics(self):
+        """the secondary metrics written in the statistics"""
+        return [m.strip() for m in self.config.log_metrics.split(",") if m.strip() != ""]
+
+    def saveResult(self, name: str, polygonData: any) -> float:
+        """
+        saves the solution as saveImage with metrics: the plot, the bitmap and the metrics share
+        a single render, the header of the plot is the value of the optimized objective function
+        :return: the objective value of the solution
+        """
+        value = self.objectiveFunction(polygonData)
         try:
-            if not isinstance(polygonData, list):
-                polygonData = list(polygonData)
-
-            # create folder if does not exist:
-            folder = os.path.join(self.output_folder, "results")
-            if not os.path.exists(folder):
-                os.makedirs(folder)
-            imageCompareFilename = os.path.join(folder, name+"_compare.png")
-            solutionFilename = os.path.join(folder, name+"_solution.txt")
-            imageGeneratedFilename = os.path.join(
-                folder, name+"_generated.bmp")
-
-            # save the image in the folder:
-            self.image_helper.saveImage(
-                polygonData, imageCompareFilename, header)
-
-            # save file data
-            # txt = str(polygonData)
-            # with open(solutionFilename, 'w') as f:
-            #    f.write(txt)
-            with open(solutionFilename, 'w') as f:
-                json.dump(polygonData, f)
-
-            # save image generated
-            imageGenerated = self.image_helper.polygonDataToImage(polygonData)
-            imageGenerated.save(imageGeneratedFilename, bitmap_format='bmp')
+            polygonData, solutionData = self.__solutionData(polygonData)
+            image = self.image_helper.polygonDataToImage(polygonData)
+            self.__writeImage(name, polygonData, solutionData, str(value), image,
+                              self.image_helper.getMetrics(image=image))
+        except Exception as e:
+            print("Error in saving image: ", e)
+        return value
 
+    def saveImage(self, name: str, polygonData: any, header=None, metrics=False):
+        st = time.time()
+        try:
+            polygonData, solutionData = self.__solutionData(polygonData)
+            # render once for the plot, the bitmap and the metrics
+            image = self.image_helper.polygonDataToImage(polygonData)
+            self.__writeImage(name, polygonData, solutionData, header, image,
+                              self.image_helper.getMetrics(image=image) if metrics else None)
         except Exception as e:
             print("Error in saving image: ", e)
 
         et = time.time()
         return et-st
 
+    def __solutionData(self, polygonData):
+        """:return: the polygon data to render and the float polygon data to save"""
+        if GenomeHelper.isQuantized(polygonData):
+            return polygonData, self.genome_helper.dequantize(polygonData)
+        if not isinstance(polygonData, list):
+            polygonData = list(polygonData)
+        return polygonData, polygonData
+
+    def __writeImage(self, name: str, polygonData, solutionData, header, imageGenerated, metrics):
+        """writes the comparison plot, the solution, the bitmap and the metrics when not None"""
+        # create folder if does not exist:
+        folder = os.path.join(self.output_folder, "results")
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        imageCompareFilename = os.path.join(folder, name+"_compare.png")
+        solutionFilename = os.path.join(folder, name+"_solution.txt")
+        imageGeneratedFilename = os.path.join(
+            folder, name+"_generated.bmp")
+
+        self.image_helper.saveImage(
+            polygonData, imageCompareFilename, header, imageGenerated)
+
+        # save file data
+        # txt = str(polygonData)
+        # with open(solutionFilename, 'w') as f:
+        #    f.write(txt)
+        with open(solutionFilename, 'w') as f:
+            json.dump(solutionData, f)
+
+        # save image generated
+        imageGenerated.save(imageGeneratedFilename, bitmap_format='bmp')
+
+        if metrics is not None:
+            metricsFilename = os.path.join(folder, name+"_metrics.txt")
+            with open(metricsFilename, 'w') as f:
+                json.dump(metrics, f)
+
+    def _refitColours(self, solution, fitness: float):
+        """
+        every colour_refit_each generations, refits in place the RGB genes of the solution
+        for its fixed geometry (see RenderHelper.refitColours). The refit is kept only if
+        the objective function improves
+        :return: (fitness, refitted)
+        """
+        each = self.config.colour_refit_each
+        if each <= 0 or self.currentGen % each != 0:
+            return fitness, False
+
+        colours = np.rint(self.image_helper.renderHelper.refitColours(
+            self.activeGenome(solution), self.config.colour_refit_sweeps))
+        chunkSize = self.genome_helper.chunkSize
+        first = 2 * self.config.polygon_size
+        idx = (np.arange(len(colours))[:, None] * chunkSize + first + np.arange(3)).ravel()
+        if self.genome_helper.quantized:
+            values = colours.astype(np.uint16).ravel()
+        else:
+            # (c + 0.5) / 255 is truncated back to c by the renderer
+            values = np.minimum((colours + 0.5) / 255, 1.0).ravel()
+
+        previous = [solution[i] for i in idx]
+        for i, v in zip(idx.tolist(), values.tolist()):
+            solution[i] = v
+        refitted_fitness = self.objectiveFunction(solution)
+        if refitted_fitness < fitness:
+            return refitted_fitness, True
+        for i, v in zip(idx.tolist(), previous):
+            solution[i] = v
+        return fitness, False
+
+    def _saveCheckpoint(self, solution, fitness: float, fitness_improved: bool):
+        """
+        saves the best solution when required by save_image_each: a row of the trajectory file
+        and/or the image artifacts
+        :return: the time spent, to be excluded from the execution time
+        """
+        if self.config.save_image_each == -1 and fitness_improved:
+            pass
+        elif self.config.save_image_each >= 1 and self.currentGen % self.config.save_image_each == 0:
+            pass
+        else:
+            return 0
+
+        st = time.time()
+        if self.__trajectory is not None:
+            if GenomeHelper.isQuantized(solution):
+                polygonData = self.genome_helper.dequantize(solution)
+            else:
+                polygonData = solution
+            self.__trajectory.append(self.currentGen, fitness, polygonData)
+        if self.config.save_artifacts:
+            self.saveImage(str(self.currentGen), solution)
+        return time.time()-st
+
     def _beginExecution(self):
+        genome_helper = self.genome_helper
+        if self.config.growth_initial_polygons > 0:
+            genome_helper.activePolygons = min(self.config.growth_initial_polygons,
+                                               genome_helper.numberOfPolygon)
+        else:
+            genome_helper.activePolygons = genome_helper.numberOfPolygon
+        self.__growth_fitness = None
+        self.__growth_stall = 0
+        if self.config.save_trajectory:
+            self.__trajectory = TrajectoryWriter(os.path.join(self.output_folder, "trajectory.bin"),
+                                                 self.num_of_params,
+                                                 self.config.polygon_size)
         output_file = os.path.join(self.output_folder, "statistic.txt")
-        self.__statistic = StatisticHelper(output_file, self.config.verbose)
-        pass
+        self.__statistic = StatisticHelper(output_file, self.config.verbose,
+                                           self.logMetrics, self.config.profile)
+        self.evaluation_helper.open()
+        self.__beginTelemetry()
+
+    def __beginTelemetry(self):
+        self.__evaluations = 0
+        self.__phase_times = {"evaluation": 0.0, "checkpoint": 0.0, "metrics": 0.0, "other": 0.0}
+        self.__telemetry_parameters = {}
+        self.__telemetry_evaluation_time = 0.0
+        self.__last_record = (np.nan, np.nan, np.nan, np.nan)
+        if self.config.telemetry == "":
+            self.__telemetry = None
+            return
+        labels = {"algorithm": type(self).__name__, "id": self.id,
+                  "image": os.path.basename(self.image_file)}
+        self.__telemetry = TelemetryServer.get(self.config.telemetry).register(labels)
+        self.__telemetry_start = time.time()
+        self.__telemetry_time = self.__telemetry_start
+        self.__telemetry_evaluations = 0
+
+    def __publishTelemetry(self, fitness, fitness_worse, fitness_mean, fitness_std, checkpoint, metrics, running=1):
+        """
+        builds a new snapshot of the metrics, the telemetry server reads the previous one until
+        the reference is replaced. The phase times are cumulated since the beginning of the run
+        """
+        now = time.time()
+        phases = self.__phase_times
+        phases["checkpoint"] += checkpoint
+        phases["metrics"] += metrics
+        iteration = now-self.__telemetry_time
+        phases["other"] += max(0.0, iteration-checkpoint-metrics -
+                               (phases["evaluation"]-self.__telemetry_evaluation_time))
+        if running:
+            rate = (self.__evaluations-self.__telemetry_evaluations)/iteration if iteration > 0 else 0.0
+        else:
+            # the mean rate of the run
+            total = now-self.__telemetry_start
+            rate = self.__evaluations/total if total > 0 else 0.0
+        self.__telemetry_time = now
+        self.__telemetry_evaluations = self.__evaluations
+        self.__telemetry_evaluation_time = phases["evaluation"]
+
+        statistic = self.__statistic
+        snapshot = [("running", {}, running),
+                    ("generation", {}, statistic.currentGen),
+                    ("elapsed_seconds", {}, statistic.offtenTime),
+                    ("best_fitness", {}, fitness),
+                    ("mean_fitness", {}, fitness_mean),
+                    ("worst_fitness", {}, fitness_worse),
+                    ("fitness_std", {}, fitness_std),
+                    ("active_polygons", {}, self.genome_helper.activePolygons),
+                    ("evaluations_total", {}, self.__evaluations),
+                    ("evaluations_per_second", {}, rate)]
+        if self.config.mask_cache_size > 0 and self.config.fast_render:
+            # the cache of this process, the workers have their own
+            cache = self.image_helper.renderHelper.maskCache
+            snapshot += [("cache_hits_total", {"cache": "mask"}, cache.hits),
+                         ("cache_misses_total", {"cache": "mask"}, cache.misses),
+                         ("cache_hit_rate", {"cache": "mask"}, cache.hitRate)]
+        snapshot += [("parameter", {"name": name}, value)
+                     for name, value in self.__telemetry_parameters.items()]
+        snapshot += [("phase_seconds_total", {"phase": name}, value)
+                     for name, value in phases.items()]
+        self.__telemetry.publish(snapshot)
 
     def _updateExecution(self, fitness: float, current_solution,
                          fitness_worse: float = np.nan,
@@ -142,20 +511,62 @@ class AlgorithmBase:
                          fitness_std: float = np.nan,
                          image_save: bool = False,
                          delta: float = 0):
+        if self.error_mutation is not None:
+            self.error_mutation.update(current_solution)
+        metrics = None
+        metrics_time = 0
+        log_metrics = self.logMetrics
+        if len(log_metrics) > 0 and self.currentGen % self.config.log_metrics_each == 0:
+            # one render of the current best for all the secondary metrics, not counted in the time
+            st = time.time()
+            metrics = self.image_helper.getMetrics(
+                current_solution, log_metrics)
+            metrics_time = time.time()-st
         self.__statistic.addRecord(fitness, fitness_worse,
-                                   fitness_mean, fitness_std,  delta)
+                                   fitness_mean, fitness_std,  delta+metrics_time, metrics)
+        self._growPolygons(fitness)
+        if self.__telemetry is not None:
+            self.__last_record = (fitness, fitness_worse, fitness_mean, fitness_std)
+            self.__publishTelemetry(fitness, fitness_worse, fitness_mean, fitness_std,
+                                    delta, metrics_time)
 
     def _endExecution(self):
+        if self.__telemetry is not None:
+            self.__publishTelemetry(*self.__last_record, 0, 0, running=0)
+            self.__telemetry = None
         self.__statistic.close()
+        self.__last_statistic = self.__statistic
         self.__statistic = None
+        self.evaluation_helper.close()
+        if self.__trajectory is not None:
+            self.__trajectory.close()
+            self.__trajectory = None
+        self.__saveCacheReport()
+
+    def __saveCacheReport(self):
+        if self.config.mask_cache_size <= 0 or not self.config.fast_render:
+            return
+        report = self.image_helper.renderHelper.maskCache.toString()
+        with open(os.path.join(self.output_folder, "mask_cache.txt"), "w") as f:
+            f.write(report+"\n")
+        if self.config.verbose:
+            print("Mask cache: "+report)
 
     def _isExecutable(self):
         if self.config.target_solution >= 0:
-            return self.__statistic.currentFitness > self.config.target_solution
+            executable = self.__statistic.currentFitness > self.config.target_solution
         elif self.config.max_time is not None and self.config.max_time >= 0:
-            return self.__statistic.offtenTime <= self.config.max_time
+            executable = self.__statistic.offtenTime <= self.config.max_time
         else:
-            return self.__statistic.currentGen <= self.config.max_generation
+            executable = self.__statistic.currentGen <= self.config.max_generation
+
+        if executable and self.__budget_controller is not None:
+            # the time spent paused by the controller is not execution time
+            start = time.time()
+            executable = self.__budget_controller.isExecutable(
+                self.__statistic.offtenTime)
+            self.__statistic.skipTime(time.time()-start)
+        return executable
 
     def executive(self):
         # abstract method
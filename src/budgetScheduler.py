@@ -0,0 +1,138 @@
+import math
+import threading
+from algorithmBase import AlgorithmBase
+
+RUN_STATE_READY = 0
+RUN_STATE_RUNNING = 1
+RUN_STATE_PAUSED = 2
+RUN_STATE_FINISHED = 3
+
+
+class BudgetController:
+    def __init__(self, algorithm: AlgorithmBase):
+        """
+        Runs the executive of an algorithm in its own thread with an extendable time budget.
+        When the budget is used up the solver is paused inside _isExecutable, with all its state,
+        until the budget is extended or the run is stopped
+        :param algorithm: the algorithm instance
+        """
+        self.algorithm = algorithm
+        self.budget = 0.0
+        self.state = RUN_STATE_READY
+        self.result = None
+        self.error = None
+        self.__stopped = False
+        self.__condition = threading.Condition()
+        self.__thread = None
+        algorithm.setBudgetController(self)
+
+    @property
+    def finished(self):
+        return self.state == RUN_STATE_FINISHED
+
+    def isExecutable(self, elapsed: float) -> bool:
+        """called by the solver thread on each iteration, blocks while the run is paused"""
+        with self.__condition:
+            while elapsed >= self.budget and not self.__stopped:
+                self.state = RUN_STATE_PAUSED
+                self.__condition.notify_all()
+                self.__condition.wait()
+            self.state = RUN_STATE_RUNNING
+            return not self.__stopped
+
+    def extend(self, seconds: float):
+        """adds seconds to the budget and waits until the solver uses them up or ends"""
+        with self.__condition:
+            self.budget += seconds
+            if self.__thread is None:
+                self.state = RUN_STATE_RUNNING
+                self.__thread = threading.Thread(target=self.__run)
+                self.__thread.start()
+            else:
+                self.__condition.notify_all()
+            self.__condition.wait_for(
+                lambda: self.state in (RUN_STATE_PAUSED, RUN_STATE_FINISHED) and
+                (self.state == RUN_STATE_FINISHED or self.algorithm.elapsedTime >= self.budget))
+
+    def stop(self):
+        """ends the run, the solver leaves its loop and returns its best solution"""
+        with self.__condition:
+            self.__stopped = True
+            self.__condition.notify_all()
+        if self.__thread is not None:
+            self.__thread.join()
+
+    def __run(self):
+        try:
+            self.result = self.algorithm.executive()
+        except Exception as err:
+            self.error = err
+        with self.__condition:
+            self.state = RUN_STATE_FINISHED
+            self.__condition.notify_all()
+
+
+class BudgetScheduler:
+    def __init__(self, algorithms: list, total_time: float, initial_time: float, eta=2.0, min_improvement=0.001):
+        """
+        Initializes a successive-halving scheduler that shares a global time budget among runs on several images
+        :param algorithms: the algorithm instances, one per image
+        :param total_time: the global budget in seconds of execution time
+        :param initial_time: the budget given to every run in the first round
+        :param eta: the fraction 1/eta of the improving runs survives each round
+        :param min_improvement: the relative fitness improvement in a round below which a run is stagnating
+        """
+        self.controllers = [BudgetController(a) for a in algorithms]
+        self.total_time = total_time
+        self.initial_time = initial_time
+        self.eta = eta
+        self.min_improvement = min_improvement
+        self.log = []
+
+    def executive(self):
+        """
+        :return: the best solutions, in the order of the algorithms (None for a failed run,
+        its exception is kept in the error of its controller)
+        """
+        active = list(self.controllers)
+        remaining = self.total_time
+        allotment = min(self.initial_time, remaining / max(1, len(active)))
+        round_index = 0
+        while len(active) > 0 and remaining > 0 and allotment > 0:
+            scores = []
+            for controller in active:
+                start_time = controller.algorithm.elapsedTime
+                controller.extend(allotment)
+                spent = controller.algorithm.elapsedTime - start_time
+                remaining -= spent
+                improvement = controller.algorithm.relativeImprovement(
+                    start_time)
+                scores.append(improvement)
+                self.log.append((round_index, controller.algorithm.image_file,
+                                 spent, improvement))
+
+            # stagnating and finished runs leave, the best 1/eta of the others survive
+            improving = [(s, c) for s, c in zip(scores, active)
+                         if not c.finished and s >= self.min_improvement]
+            improving.sort(key=lambda x: x[0], reverse=True)
+            survivors = max(1, int(math.ceil(len(improving) / self.eta))) if len(improving) > 0 else 0
+            active = [c for _, c in improving[:survivors]]
+
+            # the remaining budget is spread over the rounds still needed to reach a single run
+            if len(active) > 0:
+                rounds_left = max(1, int(math.ceil(math.log(len(active), self.eta)))) \
+                    if len(active) > 1 else 1
+                allotment = remaining / rounds_left / len(active)
+            round_index += 1
+
+        results = []
+        for controller in self.controllers:
+            controller.stop()
+            results.append(controller.result)
+        return results
+
+    def toString(self):
+        s = "round\timage\ttime\trelative_improvement\n"
+        for record in self.log:
+            s = s+"\t".join([str(x) for x in record])+"\n"
+        return s
@@ -2,7 +2,7 @@
 from collections import deque
 import random
 import time
-from statistics import mean
+from statistics import mean, median
 
 DYNPRMS_METHOD_CODE_OLS = 1
 DYNPRMS_PROBLEM_TYPE_MIN = -1
@@ -19,11 +19,15 @@ class DynamicParameters:
         self.__method_code = method_code
         if log_file != None:
             self.__log_file = open(log_file, 'w')
+            # header naming the parameter columns, see readDynamicLog
+            self.__log_file.write("\t".join(["value"]+[s['name'] for s in setting]+["coeff"])+'\n')
         else:
             self.__log_file = None
 
         self.__threshold = threshold
         self.__enable = True
+        self.__schedule = []
+        self.__registered = 0
         self.clear()
 
         self.__parameters = [0 for i in range(self.__parameter_len)]
@@ -114,6 +118,11 @@ class DynamicParameters:
         else:
             coeff = None
 
+        # until the schedule is used up the parameters follow it
+        self.__registered += 1
+        if self.__registered < len(self.__schedule):
+            self.__setValues(self.__schedule[self.__registered])
+
         if self.__log_file != None:
             st = time.time()
             gprms = self.getAll()
@@ -150,6 +159,22 @@ class DynamicParameters:
     def getAll(self):
         return self.__parameters
 
+    def warmStart(self, schedule: list):
+        """
+        the parameters take the values of schedule[0] now and of schedule[k] after the k-th registered value,
+        then they are adapted from the last values of the schedule (see fitSchedule)
+        :param schedule: lists of parameter values, in the order of the setting. The disabled parameters are not changed
+        """
+        self.__schedule = list(schedule)
+        self.__registered = 0
+        if len(self.__schedule) > 0:
+            self.__setValues(self.__schedule[0])
+
+    def __setValues(self, values: list):
+        for i in range(self.__parameter_len):
+            if self.__parameters_enable[i] and values[i] is not None:
+                self.__parameters[i] = self.__saturated(values[i], i)
+
     def clear(self):
         self.__buffer_pointer = 0
         self.__buffer = [0.0 for i in range(self.__buffer_size)]
@@ -207,6 +232,48 @@ class DynamicParameters:
             return value
 
 
+def readDynamicLog(log_file: str, names: list) -> list:
+    """
+    reads the parameter values adapted in a dynamic log, the rows of the cold start
+    (before the buffer is full, without trend coefficient) are skipped
+    :param names: the names of the parameters to read, the logs without header are in this order
+    :return: a list of rows, the values of the parameters after each adaptation,
+    None for the parameters missing in the log
+    """
+    rows = []
+    columns = None
+    with open(log_file) as f:
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            if columns is None:
+                if fields[0] == "value":
+                    columns = [fields.index(name) if name in fields else None for name in names]
+                    continue
+                columns = [i+1 if i+2 < len(fields) else None for i in range(len(names))]
+            if len(fields) < 3 or fields[-1] == "None":
+                continue
+            rows.append([float(fields[i]) if i is not None else None for i in columns])
+    return rows
+
+
+def fitSchedule(logs: list, length: int) -> list:
+    """
+    fits a schedule of the parameters to the logs of previous runs (see readDynamicLog):
+    the value of a parameter at each step is the median of its values in the logs long enough,
+    None when none of them has the parameter
+    :param logs: the rows of each log
+    :param length: the number of steps of the schedule, shorter when all the logs are shorter
+    """
+    schedule = []
+    for step in range(length):
+        rows = [log[step] for log in logs if len(log) > step]
+        if len(rows) == 0:
+            break
+        schedule.append([median(known) if len(known) > 0 else None
+                         for known in ([v for v in values if v is not None] for values in zip(*rows))])
+    return schedule
+
+
 if __name__ == "__main__":
     # TEST
     setting = [{
@@ -0,0 +1,83 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+import numpy as np
+from imageHelper import ImageHelper
+
+# objective function of a worker process, created once by _initWorker
+_worker_objective = None
+
+
+def _initWorker(image_file: str, polygon_size: int, method: str, fast: bool, mask_cache_size: int,
+                cache_folder: str):
+    global _worker_objective
+    image_helper = ImageHelper(image_file, polygon_size, mask_cache_size, cache_folder or None)
+    _worker_objective = image_helper.getDifferenceFunc(method, fast)
+
+
+def _evaluate(solution):
+    return _worker_objective(solution)
+
+
+def _payload(solution):
+    # plain lists and arrays are sent to the workers, subclasses such as
+    # DEAP individuals are not defined in the worker processes
+    return list(solution) if isinstance(solution, list) else np.asarray(solution)
+
+
+class EvaluationHelper:
+    def __init__(self, objectiveFunction, workers: int, image_file: str, polygon_size: int,
+                 method: str, fast=False, mask_cache_size=0, cache_folder=""):
+        """
+        Initializes the batch evaluator of the objective function.
+        With more than one worker the batch is split over a pool of processes, each one
+        with its own ImageHelper, otherwise the solutions are evaluated in this process
+        :param objectiveFunction: the objective function used in this process
+        :param workers: the number of worker processes
+        :param cache_folder: the on-disk reference cache of the workers, see ReferenceCache
+        """
+        self.objectiveFunction = objectiveFunction
+        self.workers = workers
+        self.__initargs = (image_file, polygon_size,
+                           method, fast, mask_cache_size, cache_folder)
+        self.__pool = None
+
+    @property
+    def isParallel(self):
+        return self.__pool is not None
+
+    def open(self):
+        if self.workers > 1 and self.__pool is None:
+            self.__pool = ProcessPoolExecutor(max_workers=self.workers,
+                                              initializer=_initWorker,
+                                              initargs=self.__initargs)
+
+    def close(self):
+        if self.__pool is not None:
+            self.__pool.shutdown()
+            self.__pool = None
+
+    def isDistributed(self, n: int) -> bool:
+        """whether a batch of n solutions is evaluated by the workers rather than by objectiveFunction"""
+        return self.__pool is not None and n > 1
+
+    def map(self, solutions) -> list:
+        """
+        evaluates a batch of solutions
+        :return: the list of the objective values, in the order of the solutions
+        """
+        if not self.isDistributed(len(solutions)):
+            return [self.objectiveFunction(s) for s in solutions]
+
+        payload = [_payload(s) for s in solutions]
+        chunksize = max(1, len(payload) // (self.workers * 4))
+        return list(self.__pool.map(_evaluate, payload, chunksize=chunksize))
+
+    def submit(self, solution) -> Future:
+        """
+        starts the evaluation of a single solution
+        :return: a future of the objective value, already done when there is no pool
+        """
+        if self.__pool is not None:
+            return self.__pool.submit(_evaluate, _payload(solution))
+        future = Future()
+        future.set_result(self.objectiveFunction(solution))
+        return future
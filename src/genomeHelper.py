@@ -0,0 +1,240 @@
+import random
+import numpy as np
+
+GENOME_MODE_FLOAT = "float"
+GENOME_MODE_INT = "int"
+
+
+class GenomeHelper:
+    def __init__(self, width: int, height: int, polygonSize: int, numberOfPolygon: int, mode=GENOME_MODE_FLOAT,
+                 rng: np.random.Generator = None):
+        """
+        Initializes the genome representation shared by all the algorithms.
+        In "float" mode a genome is a list of floats in [0,1], in "int" mode it is a uint16 array
+        holding pixel coordinates for the vertices and 0-255 values for RGBA, that is exactly
+        the information polygonDataToImage keeps after truncation
+        :param width: the width of the reference image
+        :param height: the height of the reference image
+        :param polygonSize: the number of vertices on the polygons
+        :param numberOfPolygon: the number of polygons in a genome
+        :param mode: GENOME_MODE_FLOAT or GENOME_MODE_INT
+        :param rng: the generator all the operators draw from (see RandomStreams)
+        """
+        if mode != GENOME_MODE_FLOAT and mode != GENOME_MODE_INT:
+            raise Exception("Genome mode not supported")
+        self.mode = mode
+        self.width = width
+        self.height = height
+        self.polygonSize = polygonSize
+        self.chunkSize = polygonSize * 2 + 4  # (x,y) per vertex + (RGBA)
+        self.numberOfPolygon = numberOfPolygon
+        self.numOfParams = numberOfPolygon * self.chunkSize
+        # only the first activePolygons polygons are rendered and changed by the operators,
+        # the others are kept transparent until they are activated (see AlgorithmBase growth)
+        self.activePolygons = numberOfPolygon
+
+        # largest value of every gene, a float gene f maps to int(f * upper) as in the renderer:
+        # pixel coordinates for the vertices, 0-255 for the colours
+        chunkUpper = [width, height] * polygonSize + [255] * 4
+        self.upper = np.tile(np.array(chunkUpper, np.int64), numberOfPolygon)
+
+        # by default seeded from the random module so that main.py's seed still applies
+        self.rng = rng if rng is not None else np.random.default_rng(random.getrandbits(64))
+
+    @property
+    def quantized(self):
+        return self.mode == GENOME_MODE_INT
+
+    @property
+    def activeParams(self):
+        return self.activePolygons * self.chunkSize
+
+    def hideInactive(self, batch):
+        """sets, in place, the alpha of the inactive polygons of each row to zero"""
+        alpha = np.arange(self.activePolygons, self.numberOfPolygon) * self.chunkSize + self.chunkSize - 1
+        batch[:, alpha] = 0
+
+    @staticmethod
+    def isQuantized(genome):
+        return isinstance(genome, np.ndarray) and genome.dtype.kind == 'u'
+
+    def quantize(self, polygonData):
+        """converts float polygon data to an integer genome, truncating as the renderer does"""
+        data = np.asarray(polygonData, np.float64)
+        values = np.floor(data * self.upper)
+        return np.clip(values, 0, self.upper).astype(np.uint16)
+
+    def dequantize(self, genome):
+        """converts an integer genome to float polygon data that renders to the same image"""
+        data = (np.asarray(genome, np.float64) + 0.5) / self.upper
+        return np.minimum(data, 1.0).tolist()
+
+    def fingerprint(self, genome) -> bytes:
+        """
+        returns a hashable key of the genome. Two genomes have the same fingerprint
+        when they are rendered to the same image
+        """
+        if not GenomeHelper.isQuantized(genome):
+            genome = self.quantize(genome)
+        return genome.tobytes()
+
+    def sameGenome(self, genome1, genome2):
+        return np.array_equal(genome1, genome2)
+
+    def randomSolution(self):
+        return self.rng.integers(0, self.upper + 1).astype(np.uint16)
+
+    def randomBatch(self, size):
+        """returns a batch of random genomes, one per row"""
+        if self.quantized:
+            return self.rng.integers(0, self.upper + 1, size=(size, self.numOfParams)).astype(np.uint16)
+        return self.rng.random((size, self.numOfParams))
+
+    def randomGenes(self, cols):
+        """draws uniformly a value for each gene index in cols"""
+        if self.quantized:
+            return self.rng.integers(0, self.upper[cols] + 1)
+        return self.rng.random(len(cols))
+
+    def neighborhood(self, genome, size, n=1):
+        """
+        generates a batch of neighbors of the genome, each one with n genes drawn again uniformly
+        :return: an array of shape (size, numOfParams), use fromRow to get a genome back
+        """
+        batch = np.tile(np.asarray(genome), (size, 1))
+        rows = np.repeat(np.arange(size), n)
+        cols = self.rng.integers(0, self.activeParams, size=size * n)
+        batch[rows, cols] = self.randomGenes(cols)
+        return batch
+
+    def toUnit(self, batch) -> np.ndarray:
+        """converts a batch of genomes of the current mode to float polygon data in [0,1], one per row"""
+        if self.quantized:
+            return np.minimum((np.asarray(batch, np.float64) + 0.5) / self.upper, 1.0)
+        return np.array(batch, np.float64)
+
+    def fromUnit(self, data) -> np.ndarray:
+        """converts float polygon data, one per row, to a batch of the current mode, clipped to [0,1]"""
+        data = np.clip(data, 0.0, 1.0)
+        return self.quantize(data) if self.quantized else data
+
+    def fromRow(self, row):
+        """converts a row of a batch to a genome of the current mode"""
+        return row.copy() if self.quantized else row.tolist()
+
+    def perturb(self, genome, delta):
+        """returns a copy of the genome where every gene moves by at most delta times its range"""
+        m = np.rint(self.upper * delta).astype(np.int64)
+        m[self.activeParams:] = 0
+        perturbed = genome.astype(np.int64) + self.rng.integers(-m, m + 1)
+        return np.clip(perturbed, 0, self.upper).astype(np.uint16)
+
+    def pointMutationBatch(self, batch, mutation_rates):
+        """
+        draws again, in place, each gene of the i-th row with probability mutation_rates[i]
+        :return: a boolean vector marking the rows that changed
+        """
+        mask = self.rng.random(batch.shape) < mutation_rates[:, None]
+        mask[:, self.activeParams:] = False
+        rows, cols = np.nonzero(mask)
+        batch[rows, cols] = self.randomGenes(cols)
+        return mask.any(axis=1)
+
+    def crossover(self, ind1, ind2):
+        """two-point crossover in place, slices are copied since numpy slices are views"""
+        a, b = np.sort(self.rng.choice(self.activeParams + 1, 2, replace=False))
+        ind1[a:b], ind2[a:b] = ind2[a:b].copy(), ind1[a:b].copy()
+        return ind1, ind2
+
+    def sbxCrossover(self, ind1, ind2, eta, low=0.0, up=1.0):
+        """
+        the bounded simulated binary crossover of DEAP (cxSimulatedBinaryBounded) on float genomes,
+        in place and vectorized, drawing from the genome stream
+        """
+        n = self.activeParams
+        x1 = np.clip(np.asarray(ind1[:n], np.float64), low, up)
+        x2 = np.clip(np.asarray(ind2[:n], np.float64), low, up)
+        idx = np.flatnonzero((self.rng.random(n) <= 0.5) & (np.abs(x1 - x2) > 1e-14))
+        if len(idx) == 0:
+            return ind1, ind2
+
+        lo = np.minimum(x1[idx], x2[idx])
+        hi = np.maximum(x1[idx], x2[idx])
+        rand = self.rng.random(len(idx))
+        power = 1.0 / (eta + 1.0)
+
+        def spread(beta):
+            alpha = 2.0 - beta ** -(eta + 1.0)
+            return np.where(rand <= 1.0 / alpha,
+                            (rand * alpha) ** power,
+                            (1.0 / (2.0 - rand * alpha)) ** power)
+
+        c1 = np.clip(0.5 * (lo + hi - spread(1.0 + 2.0 * (lo - low) / (hi - lo)) * (hi - lo)), low, up)
+        c2 = np.clip(0.5 * (lo + hi + spread(1.0 + 2.0 * (up - hi) / (hi - lo)) * (hi - lo)), low, up)
+        swap = self.rng.random(len(idx)) <= 0.5
+        for i, a, b in zip(idx.tolist(), np.where(swap, c2, c1).tolist(), np.where(swap, c1, c2).tolist()):
+            ind1[i] = a
+            ind2[i] = b
+        return ind1, ind2
+
+    def polynomialMutation(self, individual, indpb, eta, low=0.0, up=1.0):
+        """
+        the bounded polynomial mutation of DEAP (mutPolynomialBounded) on float genomes, in place
+        and vectorized, each gene mutates with probability indpb (a scalar or one rate per gene)
+        :return: a tuple with the mutated individual, as DEAP operators do
+        """
+        mask = self.rng.random(self.numOfParams) < indpb
+        mask[self.activeParams:] = False
+        idx = np.flatnonzero(mask)
+        if len(idx) == 0:
+            return individual,
+
+        x = np.clip(np.array([individual[i] for i in idx], np.float64), low, up)
+        span = up - low
+        rand = self.rng.random(len(idx))
+        power = 1.0 / (eta + 1.0)
+        lower = rand < 0.5
+        xy = np.where(lower, 1.0 - (x - low) / span, 1.0 - (up - x) / span)
+        val = np.where(lower,
+                       2.0 * rand + (1.0 - 2.0 * rand) * xy ** (eta + 1.0),
+                       2.0 * (1.0 - rand) + 2.0 * (rand - 0.5) * xy ** (eta + 1.0))
+        delta_q = np.where(lower, val ** power - 1.0, 1.0 - val ** power)
+        x = np.clip(x + delta_q * span, low, up)
+        for i, v in zip(idx.tolist(), x.tolist()):
+            individual[i] = v
+        return individual,
+
+    def selTournament(self, individuals, k, tournsize=2):
+        """as DEAP tools.selTournament, drawing the aspirants from the genome stream"""
+        wvalues = np.array([ind.fitness.wvalues[0] for ind in individuals])
+        aspirants = self.rng.integers(0, len(individuals), size=(k, tournsize))
+        winners = aspirants[np.arange(k), np.argmax(wvalues[aspirants], axis=1)]
+        return [individuals[i] for i in winners]
+
+    def varAnd(self, population, toolbox, cxpb, mutpb):
+        """as DEAP algorithms.varAnd, drawing the crossover and mutation events from the genome stream"""
+        offspring = [toolbox.clone(ind) for ind in population]
+        for i in range(1, len(offspring), 2):
+            if self.rng.random() < cxpb:
+                offspring[i - 1], offspring[i] = toolbox.mate(offspring[i - 1], offspring[i])
+                del offspring[i - 1].fitness.values, offspring[i].fitness.values
+        for i in range(len(offspring)):
+            if self.rng.random() < mutpb:
+                offspring[i], = toolbox.mutate(offspring[i])
+                del offspring[i].fitness.values
+        return offspring
+
+    def creepMutation(self, genome, indpb, eta):
+        """
+        moves, in place, each gene with probability indpb (a scalar or one rate per gene) by a rounded gaussian step,
+        the step shrinks as eta grows like the polynomial mutation does
+        :return: a tuple with the mutated genome, as DEAP operators do
+        """
+        mask = self.rng.random(self.numOfParams) < indpb
+        mask[self.activeParams:] = False
+        if mask.any():
+            sigma = self.upper[mask] / (eta + 1.0)
+            step = np.rint(self.rng.normal(0.0, sigma))
+            values = genome[mask].astype(np.int64) + step.astype(np.int64)
+            genome[mask] = np.clip(values, 0, self.upper[mask])
+        return genome,
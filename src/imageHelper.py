@@ -5,30 +5,76 @@ import cv2
 import matplotlib.pyplot as plt
 from math import log10, sqrt
 from sewar.full_ref import uqi
+from renderHelper import RenderHelper, RENDER_ERROR_SQUARED, RENDER_ERROR_ABSOLUTE
+from genomeHelper import GenomeHelper
+from referenceCache import ReferenceCache
 
 
 class ImageHelper:
 
-    def __init__(self, imagePath, polygonSize=3):
+    def __init__(self, imagePath, polygonSize=3, maskCacheSize=0, cacheFolder=None):
         """
         Initializes an instance of the class
         :param imagePath: the path of the file containing the reference image
         :param polygonSize: the number of vertices on the polygons used to recreate the image
+        :param maskCacheSize: capacity of the coverage-mask cache of the fast renderer (0 disables it)
+        :param cacheFolder: the folder of the on-disk cache of the decoded reference and of the arrays
+        derived from it (see ReferenceCache), None to decode and compute them on each construction
         """
-        self.refImage = Image.open(imagePath)
+        self.referenceCache = ReferenceCache(cacheFolder, imagePath) if cacheFolder else None
+        image = Image.open(imagePath)
+        if self.referenceCache is not None and image.mode in ("L", "RGB", "RGBA"):
+            # the other modes (e.g. palette) are not restored by fromarray, they are decoded each time
+            image = Image.fromarray(self.__cached("decoded", lambda: np.asarray(image)))
+        self.refImage = image
         self.polygonSize = polygonSize
 
         self.width, self.height = self.refImage.size
         self.numPixels = self.width * self.height
-        self.refImageCv2 = self.toCv2(self.refImage)
+        self.refImageCv2 = self.__cached("cv2", lambda: self.toCv2(self.refImage))
+        self.maskCacheSize = maskCacheSize
+        self.__renderHelper = None
+        self.__integral = None
+
+    def __cached(self, name, compute):
+        if self.referenceCache is None:
+            return compute()
+        return self.referenceCache.array(name, compute)
+
+    @property
+    def refArray(self) -> np.ndarray:
+        """the reference image as an RGB uint8 array of shape (height, width, 3)"""
+        return self.__cached("rgb", lambda: np.asarray(self.refImage.convert('RGB')))
+
+    @property
+    def integralImage(self) -> np.ndarray:
+        """the summed-area table of the RGB reference, see ImageHelper.IntegralImage"""
+        if self.__integral is None:
+            self.__integral = self.__cached("integral", lambda: ImageHelper.IntegralImage(self.refArray))
+        return self.__integral
+
+    @property
+    def renderHelper(self) -> RenderHelper:
+        """the scanline renderer used by the fast difference functions, created on first use"""
+        if self.__renderHelper is None:
+            # already float32, the renderer uses the (memory mapped) array without copying it
+            reference = self.__cached("rgb_float32", lambda: self.refArray.astype(np.float32))
+            self.__renderHelper = RenderHelper(
+                reference, self.polygonSize, maskCacheSize=self.maskCacheSize)
+        return self.__renderHelper
 
     def polygonDataToImage(self, polygonData):
         """
         accepts polygon data and creates an image containing these polygons.
         :param polygonData: a list of polygon parameters. Each item in the list
-        represents the vertices locations, color and transparency of the corresponding polygon
+        represents the vertices locations, color and transparency of the corresponding polygon.
+        A quantized genome (see GenomeHelper) holds pixel coordinates and 0-255 colours directly
         :return: the image containing the polygons (Pillow format)
         """
+        if GenomeHelper.isQuantized(polygonData):
+            scaleX, scaleY, scaleColour = 1, 1, 1
+        else:
+            scaleX, scaleY, scaleColour = self.width, self.height, 255
 
         # start with a new image:
         image = Image.new('RGB', (self.width, self.height))  # TODO
@@ -46,14 +92,14 @@ class ImageHelper:
             vertices = []
             for vertex in range(self.polygonSize):
                 vertices.append(
-                    (int(poly[index] * self.width), int(poly[index + 1] * self.height)))
+                    (int(poly[index] * scaleX), int(poly[index + 1] * scaleY)))
                 index += 2
 
             # extract the RGB and alpha values of the current polygon:
-            red = int(poly[index] * 255)
-            green = int(poly[index + 1] * 255)
-            blue = int(poly[index + 2] * 255)
-            alpha = int(poly[index + 3] * 255)
+            red = int(poly[index] * scaleColour)
+            green = int(poly[index + 1] * scaleColour)
+            blue = int(poly[index + 2] * scaleColour)
+            alpha = int(poly[index + 3] * scaleColour)
 
             # draw the polygon into the image:
             draw.polygon(vertices, (red, green, blue, alpha))
@@ -63,7 +109,7 @@ class ImageHelper:
 
         return image
 
-    def getDifferenceFunc(self, method="MSE"):
+    def getDifferenceFunc(self, method="MSE", fast=False):
         """
         accepts polygon data, creates an image containing these polygons, and calculates the difference
         between this image and the reference image using one of two methods.
@@ -71,8 +117,21 @@ class ImageHelper:
         represents the vertices locations, color and transparency of the corresponding polygon
         :param method: base method of calculating the difference ("MSE" or "SSIM" or "PSNR").
         larger return value always means larger difference
+        :param fast: for "MSE" and "LOSS" use the fused render-and-score kernel of RenderHelper,
+        which never creates the Pillow image
         :return: the calculated difference between the image containg the polygons and the reference image
         """
+        if fast and method in ("MSE", "LOSS"):
+            renderHelper = self.renderHelper
+
+            def _fast_mse(polygonData):
+                return renderHelper.getError(polygonData, RENDER_ERROR_SQUARED)/float(self.numPixels)
+
+            def _fast_loss(polygonData):
+                return renderHelper.getError(polygonData, RENDER_ERROR_ABSOLUTE)
+
+            return _fast_mse if method == "MSE" else _fast_loss
+
         def _internal_mse(polygonData):
             image = self.polygonDataToImage(polygonData)
             return self.getMse(image)
@@ -109,6 +168,38 @@ class ImageHelper:
     def symiliarityMethods():
         return ["MSE", "SSIM", "PSNR", "LOSS", "CP", "UQI"]
 
+    def getMetrics(self, polygonData=None, methods=None, image=None):
+        """
+        renders the polygons once and calculates several metrics on the same image
+        :param polygonData: a list of polygon parameters, ignored when image is given
+        :param methods: the metrics to calculate, all of symiliarityMethods() when None
+        :param image: an image already rendered from the polygon data (Pillow format)
+        :return: a dictionary with the raw value of each metric (not converted to a difference)
+        """
+        if image is None:
+            image = self.polygonDataToImage(polygonData)
+        if methods is None:
+            methods = ImageHelper.symiliarityMethods()
+
+        metrics = {}
+        for method in methods:
+            if method == "MSE":
+                value = self.getMse(image)
+            elif method == "SSIM":
+                value = self.getSsim(image)
+            elif method == "PSNR":
+                value = self.getPSNR(image)
+            elif method == "LOSS":
+                value = self.getLoss(image)
+            elif method == "CP":
+                value = self.getCP(image)
+            elif method == "UQI":
+                value = self.getQualityIndex(image)
+            else:
+                raise Exception("Method not supported")
+            metrics[method] = float(value)
+        return metrics
+
     def getDifference(self, polygonData, method="MSE"):
         """
         accepts polygon data, creates an image containing these polygons, and calculates the difference
@@ -159,7 +250,7 @@ class ImageHelper:
 
         return fig
 
-    def saveImage(self, polygonData, imageFilePath, header=None):
+    def saveImage(self, polygonData, imageFilePath, header=None, image=None):
         """
         accepts polygon data, creates an image containing these polygons,
         creates a 'side-by-side' plot of this image next to the reference image,
@@ -168,9 +259,11 @@ class ImageHelper:
         represents the vertices locations, color and transparency of the corresponding polygon
         :param imageFilePath: path of file to be used to save the plot to
         :param header: text used as a header for the plot
+        :param image: the image already rendered from the polygon data, to avoid rendering it again
         """
         # create an image from th epolygon data:
-        image = self.polygonDataToImage(polygonData)
+        if image is None:
+            image = self.polygonDataToImage(polygonData)
 
         # plot the image side-by-side with the reference image:
         fig = self.plotImages(image, header)
@@ -212,7 +305,11 @@ class ImageHelper:
 
     def getSsim(self, image):
         """calculates mean structural similarity index between the given image and the reference image"""
-        return structural_similarity(self.toCv2(image), self.refImageCv2, multichannel=True)
+        try:
+            return structural_similarity(self.toCv2(image), self.refImageCv2, channel_axis=2)
+        except TypeError:
+            # scikit-image < 0.19
+            return structural_similarity(self.toCv2(image), self.refImageCv2, multichannel=True)
 
     def getPSNR(self, image):
         original = self.refImageCv2
@@ -244,25 +341,44 @@ class ImageHelper:
             labelleft=False,
         )
 
+    def IntegralImage(rgb) -> np.ndarray:
+        """the summed-area table of an RGB array, padded with a leading row and column of zeros"""
+        h, w = rgb.shape[:2]
+        integral = np.zeros((h + 1, w + 1, 3), np.float64)
+        integral[1:, 1:] = rgb[:, :, :3].astype(np.float64).cumsum(0).cumsum(1)
+        return integral
+
     def toRealMatrix(self):
         return ImageHelper.ToRealMatrix(self.refImage)
 
     def ToRealMatrix(image: Image.Image):
-        numpydata = np.asarray(image)
-        matrix = np.zeros((numpydata.shape[0], numpydata.shape[1]))
-        for r in range(matrix.shape[0]):
-            for c in range(matrix.shape[1]):
-                matrix[r, c] = ImageHelper.GetDoublefromRGB(numpydata[r, c, :])
-        return matrix
+        return ImageHelper.RGBArrayToReal(np.asarray(image))
 
     def FromRealMatrix(matrix) -> Image.Image:
-        data = np.zeros((matrix.shape[0], matrix.shape[1], 3), np.uint8)
-        for r in range(matrix.shape[0]):
-            for c in range(matrix.shape[1]):
-                data[r, c, :] = ImageHelper.GetRGBfromDouble(matrix[r, c])
+        data = ImageHelper.RealToRGBArray(matrix)
         image = Image.fromarray(data, mode='RGB')
         return image
 
+    def ToRealMatrixBatch(images) -> np.ndarray:
+        """converts a list of images with the same size to a stack of real matrices, shape (n, height, width)"""
+        return ImageHelper.RGBArrayToReal(np.stack([np.asarray(image)[..., :3] for image in images]))
+
+    def FromRealMatrixBatch(matrices) -> list:
+        """converts a stack of real matrices, shape (n, height, width), to a list of images"""
+        data = ImageHelper.RealToRGBArray(matrices)
+        return [Image.fromarray(d, mode='RGB') for d in data]
+
+    def RGBArrayToReal(data) -> np.ndarray:
+        """packs the red, green and blue channels of an array of shape (..., 3) in a real value in [0,1]"""
+        rgb = np.asarray(data)[..., :3].astype(np.uint32)
+        return ((rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2])/16777215
+
+    def RealToRGBArray(matrix) -> np.ndarray:
+        """unpacks an array of real values in [0,1] to a uint8 array of shape (..., 3)"""
+        packed = (np.asarray(matrix, np.float64)*16777215).astype(np.int64)
+        # red,gree,blue
+        return np.stack(((packed >> 16) & 255, (packed >> 8) & 255, packed & 255), axis=-1).astype(np.uint8)
+
     def GetRGBfromDouble(RGBDouble):
         RGBint = int(RGBDouble*16777215)
         # red,gree,blue
@@ -270,4 +386,4 @@ class ImageHelper:
 
     def GetDoublefromRGB(rgb):
         # red,gree,blue
-        return ((rgb[0] << 16) + (rgb[1] << 8) + rgb[2])/16777215
+        return ((int(rgb[0]) << 16) + (int(rgb[1]) << 8) + int(rgb[2]))/16777215
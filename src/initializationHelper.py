@@ -0,0 +1,114 @@
+import math
+import numpy as np
+from genomeHelper import GenomeHelper
+from imageHelper import ImageHelper
+
+try:
+    from scipy.stats import qmc
+except ImportError:  # Sobol initialization is not available
+    qmc = None
+
+INIT_STRATEGY_UNIFORM = "uniform"
+INIT_STRATEGY_LHS = "lhs"
+INIT_STRATEGY_SOBOL = "sobol"
+INIT_STRATEGY_REFERENCE = "reference"
+
+
+class InitializationHelper:
+    def __init__(self, genome_helper: GenomeHelper, reference, strategy=INIT_STRATEGY_UNIFORM,
+                 sizeMin=0.1, sizeMax=0.5, integral=None):
+        """
+        Initializes the generator of the initial solutions shared by all the algorithms
+        :param genome_helper: the genome representation
+        :param reference: the reference image as an RGB array of shape (height, width, 3)
+        :param strategy: "uniform", "lhs" (Latin hypercube), "sobol" (scrambled Sobol sequence, requires scipy)
+        or "reference" (polygons around sampled locations filled with the mean colour of the reference there)
+        :param sizeMin: the smallest half extent of a polygon in "reference" mode, as a fraction of the image side
+        :param sizeMax: the largest half extent of a polygon in "reference" mode, as a fraction of the image side
+        :param integral: a function returning the summed-area table of the reference (see ImageHelper.integralImage),
+        called on first use, by default it is computed from the reference
+        """
+        if strategy not in (INIT_STRATEGY_UNIFORM, INIT_STRATEGY_LHS, INIT_STRATEGY_SOBOL, INIT_STRATEGY_REFERENCE):
+            raise Exception("Initialization strategy not supported")
+        if strategy == INIT_STRATEGY_SOBOL and qmc is None:
+            raise Exception("Sobol initialization not supported without scipy")
+        self.genome_helper = genome_helper
+        self.reference = reference
+        self.strategy = strategy
+        self.sizeMin = sizeMin
+        self.sizeMax = sizeMax
+        self.__integral = None
+        self.__integral_fcn = integral if integral is not None else lambda: ImageHelper.IntegralImage(reference)
+
+    @property
+    def rng(self) -> np.random.Generator:
+        return self.genome_helper.rng
+
+    @property
+    def integralImage(self) -> np.ndarray:
+        """the summed-area table of the reference, padded with a leading row and column of zeros"""
+        if self.__integral is None:
+            self.__integral = self.__integral_fcn()
+        return self.__integral
+
+    def meanColour(self, x0, y0, x1, y1) -> np.ndarray:
+        """returns the mean RGB colour of the reference in the pixel boxes [x0,x1)x[y0,y1), for arrays of boxes"""
+        s = self.integralImage
+        total = s[y1, x1] - s[y0, x1] - s[y1, x0] + s[y0, x0]
+        area = ((x1 - x0) * (y1 - y0))[..., None]
+        return total / area
+
+    def batch(self, n) -> np.ndarray:
+        """returns n initial solutions as the rows of a matrix, in the genome mode"""
+        if self.strategy == INIT_STRATEGY_UNIFORM:
+            return self.genome_helper.randomBatch(n)
+        elif self.strategy == INIT_STRATEGY_LHS:
+            data = self.latinHypercube(n)
+        elif self.strategy == INIT_STRATEGY_SOBOL:
+            data = self.sobol(n)
+        else:
+            data = self.referenceSampled(n)
+
+        if self.genome_helper.quantized:
+            return self.genome_helper.quantize(data)
+        return data
+
+    def latinHypercube(self, n) -> np.ndarray:
+        """every gene takes exactly one value in each of the n strata of [0,1]"""
+        d = self.genome_helper.numOfParams
+        strata = self.rng.permuted(np.tile(np.arange(n), (d, 1)), axis=1).T
+        return (strata + self.rng.random((n, d))) / n
+
+    def sobol(self, n) -> np.ndarray:
+        # the balance properties hold for powers of 2, the first n points are kept
+        sampler = qmc.Sobol(self.genome_helper.numOfParams, scramble=True, seed=self.rng)
+        return sampler.random_base2(max(0, int(math.ceil(math.log2(n)))))[:n]
+
+    def referenceSampled(self, n) -> np.ndarray:
+        """
+        places every polygon around a sampled location and colours it with the mean colour
+        of the reference over its bounding box, the opacity is drawn in [0.5,1] so that
+        the composited image stays close to these colours
+        """
+        gh = self.genome_helper
+        k = gh.polygonSize
+        numberOfPolygon = gh.numOfParams // gh.chunkSize
+        h, w = self.reference.shape[:2]
+        shape = (n, numberOfPolygon)
+
+        center = self.rng.random(shape + (1, 2))
+        extent = self.rng.uniform(self.sizeMin, self.sizeMax, shape + (1, 1))
+        vertices = np.clip(center + self.rng.uniform(-1, 1, shape + (k, 2)) * extent, 0, 1)
+
+        # the bounding box in pixels, at least one pixel wide
+        size = np.array([w, h])
+        low = np.minimum(np.floor(vertices.min(axis=2) * size).astype(np.int64), size - 1)
+        high = np.maximum(np.ceil(vertices.max(axis=2) * size).astype(np.int64), low + 1)
+        colour = self.meanColour(low[..., 0], low[..., 1], high[..., 0], high[..., 1])
+
+        data = np.empty(shape + (gh.chunkSize,), np.float64)
+        data[..., :2 * k] = vertices.reshape(shape + (2 * k,))
+        # (c + 0.5) / 255 is truncated back to c by the renderer
+        data[..., 2 * k:2 * k + 3] = np.minimum((colour + 0.5) / 255, 1.0)
+        data[..., 2 * k + 3] = self.rng.uniform(0.5, 1, shape)
+        return data.reshape(n, gh.numOfParams)
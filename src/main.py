@@ -5,6 +5,17 @@ import os
 import random
 from configparser import ConfigParser
 from algorithmBase import AlgorithmBase, AlgorithmConfigBase
+from tileSolver import TileSolver
+from budgetScheduler import BudgetScheduler
+from rngHelper import RandomStreams
+from profileHelper import ProfileHelper
+
+
+def finalize(algorithm_instance: AlgorithmBase, result):
+    # the optimized objective value, one render for the plot, the bitmap and the metrics
+    eval_result = algorithm_instance.saveResult("final_result", result)
+    print(eval_result)
+    return eval_result
 
 
 def main(argc, argv):
@@ -17,7 +28,8 @@ def main(argc, argv):
         "irace_output=",
         "irace_id=",
         "custom_params=",
-        "seed_value="
+        "seed_value=",
+        "profile"
     ])
 
     IMAGE_FOLDER = "./images"
@@ -29,6 +41,7 @@ def main(argc, argv):
     CONFIG_FILE = None
     IRACE_OUTPUT = None
     IRACE_ID = "test"
+    PROFILE = False
 
     for opt, arg in opts:
         if opt in ("-d", "--image_folder"):
@@ -49,6 +62,8 @@ def main(argc, argv):
             CUSTOM_PARMS = arg
         elif opt in ("-s", "--seed"):
             SEED_VALUE = int(arg)
+        elif opt == "--profile":
+            PROFILE = True
 
     custom_parameters = []
     if CUSTOM_PARMS != None:
@@ -63,6 +78,7 @@ def main(argc, argv):
         raise Exception("I don't know where I have to save the results!")
 
     random.seed(SEED_VALUE)
+    streams = RandomStreams(SEED_VALUE)
 
     config = ConfigParser()
     if CONFIG_FILE != None and os.path.exists(CONFIG_FILE):
@@ -78,10 +94,12 @@ def main(argc, argv):
     algorithm_class = getattr(algorithm_module, algorithm)
     algorithm_config_class = getattr(algorithm_module, algorithm+"Config")
 
-    files = os.listdir(IMAGE_FOLDER)
+    # sorted so that each image gets the same child stream whatever the directory order
+    files = sorted(os.listdir(IMAGE_FOLDER))
     irace_eval_result = 0
     irace_eval_count = 0
-    for file in files:
+    scheduled = []
+    for image_index, file in enumerate(files):
         try:
             image_name = os.path.splitext(os.path.basename(file))[0]
             image_file = os.path.join(IMAGE_FOLDER, file)
@@ -94,6 +112,8 @@ def main(argc, argv):
             print("Run-> "+image_name+"::"+algorithm+"::"+IRACE_ID)
             algorithm_config_instance: AlgorithmConfigBase = algorithm_config_class(
                 config)
+            if PROFILE:
+                algorithm_config_instance.profile = True
             if VERBOSE:
                 algorithm_config_instance.verbose = VERBOSE
                 print(algorithm_config_instance.toString(multiline=True))
@@ -102,18 +122,50 @@ def main(argc, argv):
                 algorithm_config_instance,
                 image_file,
                 output_folder,
-                IRACE_ID)
-            result = algorithm_instance.executive()
-            eval_result = algorithm_instance.objectiveFunction(result)
-            algorithm_instance.saveImage(
-                "final_result", result, str(eval_result))
-            print(eval_result)
+                IRACE_ID,
+                streams.child(image_index))
+            if algorithm_config_instance.schedule_total_time > 0:
+                if algorithm_config_instance.tile_rows * algorithm_config_instance.tile_cols > 1:
+                    raise Exception("tiled mode not supported with schedule_total_time")
+                # runs share a global time budget, they are started together below
+                scheduled.append((image_name, algorithm_instance))
+                continue
+            if algorithm_config_instance.tile_rows * algorithm_config_instance.tile_cols > 1:
+                executive = TileSolver(algorithm_instance, algorithm).executive
+            else:
+                executive = algorithm_instance.executive
+            if algorithm_config_instance.profile:
+                result = ProfileHelper(output_folder).run(executive)
+            else:
+                result = executive()
+            eval_result = finalize(algorithm_instance, result)
             irace_eval_result = irace_eval_result + eval_result
             irace_eval_count = irace_eval_count + 1
         except Exception as err:
             print(OUTPUT_FOLDER+"::::"+image_name +
                   "::::"+algorithm+"-ERROR-"+str(err))
 
+    if len(scheduled) > 0:
+        schedule_config = scheduled[0][1].config
+        scheduler = BudgetScheduler([x[1] for x in scheduled],
+                                    schedule_config.schedule_total_time,
+                                    schedule_config.schedule_initial_time,
+                                    schedule_config.schedule_eta,
+                                    schedule_config.schedule_min_improvement)
+        results = scheduler.executive()
+        with open(os.path.join(OUTPUT_FOLDER, "schedule.txt"), 'w') as f:
+            f.write(scheduler.toString())
+        for (image_name, algorithm_instance), controller, result in zip(scheduled, scheduler.controllers, results):
+            try:
+                if controller.error is not None:
+                    raise controller.error
+                eval_result = finalize(algorithm_instance, result)
+                irace_eval_result = irace_eval_result + eval_result
+                irace_eval_count = irace_eval_count + 1
+            except Exception as err:
+                print(OUTPUT_FOLDER+"::::"+image_name +
+                      "::::"+algorithm+"-ERROR-"+str(err))
+
     if IRACE_OUTPUT != None:
         with open(IRACE_OUTPUT, 'w') as f:
             f.write(str(int(irace_eval_result/irace_eval_count)))
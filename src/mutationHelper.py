@@ -0,0 +1,156 @@
+import numpy as np
+from genomeHelper import GenomeHelper
+from renderHelper import RenderHelper
+
+
+class ErrorGuidedMutation:
+    def __init__(self, render_helper: RenderHelper, genome_helper: GenomeHelper, cellSize=8, uniformRate=0.2):
+        """
+        Mutation operators biased by a downsampled per-pixel error map of the current best solution.
+        Polygons are picked for mutation with a probability proportional to the mean error under their
+        bounding box, and relocated vertices are drawn where the error is high
+        :param render_helper: the renderer used to compute the error map
+        :param genome_helper: the genome representation
+        :param cellSize: the side in pixels of a cell of the error map
+        :param uniformRate: the share of the probabilities spread uniformly, so that no polygon
+        or location is ever excluded
+        """
+        self.render_helper = render_helper
+        self.genome_helper = genome_helper
+        self.cellSize = cellSize
+        self.uniformRate = uniformRate
+
+        gh = genome_helper
+        k = gh.polygonSize
+        self.numberOfPolygon = gh.numOfParams // gh.chunkSize
+        self.rows = -(-gh.height // cellSize)
+        self.cols = -(-gh.width // cellSize)
+
+        # the polygon of each gene and the genes holding the x and y coordinates of the vertices
+        position = np.arange(gh.numOfParams) % gh.chunkSize
+        self.genePolygon = np.arange(gh.numOfParams) // gh.chunkSize
+        self.xGenes = (position < 2 * k) & (position % 2 == 0)
+        self.yGenes = (position < 2 * k) & (position % 2 == 1)
+
+        # uniform until the first update
+        self.__key = None
+        self.setErrorMap(np.ones((self.rows, self.cols)))
+
+    @property
+    def rng(self) -> np.random.Generator:
+        return self.genome_helper.rng
+
+    def _mix(self, weights):
+        """normalizes the weights along the last axis and mixes them with the uniform distribution"""
+        total = weights.sum(axis=-1, keepdims=True)
+        n = weights.shape[-1]
+        p = np.divide(weights, total, out=np.full(weights.shape, 1.0 / n), where=total > 0)
+        return (1 - self.uniformRate) * p + self.uniformRate / n
+
+    def setErrorMap(self, errorMap: np.ndarray):
+        """sets the error of each cell, shape (rows, cols)"""
+        self.errorMap = errorMap
+        integral = np.zeros((self.rows + 1, self.cols + 1), np.float64)
+        integral[1:, 1:] = errorMap.cumsum(0).cumsum(1)
+        self.__integral = integral
+        self.__columnProbability = self._mix(errorMap.sum(axis=0))
+        self.__rowProbability = self._mix(errorMap.sum(axis=1))
+
+    def update(self, best):
+        """recomputes the error map only when the best solution changed"""
+        key = self.genome_helper.fingerprint(best)
+        if key == self.__key:
+            return
+        self.__key = key
+        buffer = self.render_helper.render(best)
+        error = np.square(buffer - self.render_helper.reference).sum(axis=2, dtype=np.float64)
+
+        # sum the error of each cell, the last row and column of cells may be partial
+        cell = self.cellSize
+        padded = np.zeros((self.rows * cell, self.cols * cell), np.float64)
+        padded[:error.shape[0], :error.shape[1]] = error
+        self.setErrorMap(padded.reshape(self.rows, cell, self.cols, cell).sum(axis=(1, 3)))
+
+    def polygonWeights(self, batch) -> np.ndarray:
+        """
+        :param batch: genomes, one per row
+        :return: the probability of mutating each polygon of each genome, shape (rows, numberOfPolygon)
+        """
+        gh = self.genome_helper
+        k = gh.polygonSize
+        data = np.asarray(batch, np.float64).reshape(-1, self.numberOfPolygon, gh.chunkSize)
+        x = data[..., 0:2 * k:2]
+        y = data[..., 1:2 * k:2]
+        if not gh.quantized:
+            x = x * gh.width
+            y = y * gh.height
+
+        # the bounding box in cells, at least one cell wide
+        c0 = np.clip(np.floor(x.min(axis=2) / self.cellSize), 0, self.cols - 1).astype(np.int64)
+        c1 = np.clip(np.floor(x.max(axis=2) / self.cellSize) + 1, c0 + 1, self.cols).astype(np.int64)
+        r0 = np.clip(np.floor(y.min(axis=2) / self.cellSize), 0, self.rows - 1).astype(np.int64)
+        r1 = np.clip(np.floor(y.max(axis=2) / self.cellSize) + 1, r0 + 1, self.rows).astype(np.int64)
+        s = self.__integral
+        total = s[r1, c1] - s[r0, c1] - s[r1, c0] + s[r0, c0]
+        return self._mix(total / ((r1 - r0) * (c1 - c0)))
+
+    def geneScale(self, batch) -> np.ndarray:
+        """the per-gene multiplier of the mutation rates, 1 on average over a genome"""
+        return self.polygonWeights(batch)[:, self.genePolygon] * self.numberOfPolygon
+
+    def sampleValues(self, cols) -> np.ndarray:
+        """draws a value for each gene index in cols, the vertices are placed according to the error map"""
+        gh = self.genome_helper
+        values = gh.randomGenes(cols)
+        for genes, probability, side in ((self.xGenes[cols], self.__columnProbability, gh.width),
+                                         (self.yGenes[cols], self.__rowProbability, gh.height)):
+            n = int(genes.sum())
+            if n == 0:
+                continue
+            cells = self.rng.choice(len(probability), size=n, p=probability)
+            pixels = np.minimum((cells + self.rng.random(n)) * self.cellSize, side)
+            values[genes] = np.floor(pixels) if gh.quantized else pixels / side
+        return values
+
+    def neighborhood(self, genome, size, n=1):
+        """as GenomeHelper.neighborhood, the n genes of each neighbor are drawn by polygon weight"""
+        gh = self.genome_helper
+        batch = np.tile(np.asarray(genome), (size, 1))
+        rows = np.repeat(np.arange(size), n)
+        active = gh.activePolygons
+        weights = self.polygonWeights(batch[:1])[0, :active]
+        polygons = self.rng.choice(active, size=size * n, p=weights / weights.sum())
+        cols = polygons * gh.chunkSize + self.rng.integers(0, gh.chunkSize, size=size * n)
+        batch[rows, cols] = self.sampleValues(cols)
+        return batch
+
+    def pointMutationBatch(self, batch, mutation_rates):
+        """as GenomeHelper.pointMutationBatch, each gene rate is scaled by the weight of its polygon"""
+        rates = np.minimum(mutation_rates[:, None] * self.geneScale(batch), 1.0)
+        rates[:, self.genome_helper.activeParams:] = 0
+        mask = self.rng.random(batch.shape) < rates
+        rows, cols = np.nonzero(mask)
+        batch[rows, cols] = self.sampleValues(cols)
+        return mask.any(axis=1)
+
+    def perturb(self, genome, delta):
+        """returns a copy of the genome where every gene moves by at most delta times its range and polygon scale"""
+        scale = self.geneScale(genome)[0]
+        scale[self.genome_helper.activeParams:] = 0
+        if self.genome_helper.quantized:
+            upper = self.genome_helper.upper
+            m = np.rint(upper * delta * scale).astype(np.int64)
+            perturbed = genome.astype(np.int64) + self.rng.integers(-m, m + 1)
+            return np.clip(perturbed, 0, upper).astype(np.uint16)
+        m = delta * scale
+        return (np.asarray(genome, np.float64) + self.rng.uniform(-m, m)).tolist()
+
+    def creepMutation(self, genome, indpb, eta):
+        """as GenomeHelper.creepMutation, each gene rate is scaled by the weight of its polygon"""
+        rates = np.minimum(indpb * self.geneScale(genome)[0], 1.0)
+        return self.genome_helper.creepMutation(genome, rates, eta)
+
+    def polynomialMutation(self, individual, low, up, eta, indpb):
+        """as GenomeHelper.polynomialMutation, each gene rate is scaled by the weight of its polygon"""
+        rates = np.minimum(indpb * self.geneScale(individual)[0], 1.0)
+        return self.genome_helper.polynomialMutation(individual, rates, eta, low, up)
@@ -0,0 +1,68 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # the peak RSS is not available on Windows
+    resource = None
+
+
+def peakRss() -> float:
+    """the peak resident set size of the process in MB, nan when not available"""
+    if resource is None:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class ProfileHelper:
+    def __init__(self, output_folder: str, top=30, frames=1):
+        """
+        Initializes the profiling of a run with the deterministic profiler (cProfile) and tracemalloc.
+        The code running in other processes (evaluation and tile workers) is not profiled
+        :param output_folder: the folder of the reports
+        :param top: the number of functions and allocation sites in the text reports
+        :param frames: the number of frames kept by tracemalloc for each allocation
+        """
+        self.output_folder = output_folder
+        self.top = top
+        self.frames = frames
+
+    def run(self, function, *args):
+        """
+        calls function(*args) under the profilers and writes in the output folder:
+        profile.pstats (to be loaded with pstats or snakeviz), profile.txt (functions by cumulative time)
+        and allocations.txt (the allocation sites of the memory still in use and the traced peak)
+        :return: the result of the function
+        """
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start(self.frames)
+        tracemalloc.reset_peak()
+        profiler = cProfile.Profile()
+        try:
+            result = profiler.runcall(function, *args)
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if started:
+                tracemalloc.stop()
+
+        profiler.dump_stats(os.path.join(self.output_folder, "profile.pstats"))
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(self.top)
+        with open(os.path.join(self.output_folder, "profile.txt"), "w") as f:
+            f.write(text.getvalue())
+
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        with open(os.path.join(self.output_folder, "allocations.txt"), "w") as f:
+            f.write("traced_current_mb=%.3f\ntraced_peak_mb=%.3f\npeak_rss_mb=%.3f\n\n" %
+                    (current / 2**20, peak / 2**20, peakRss()))
+            for stat in snapshot.statistics("lineno")[:self.top]:
+                f.write(str(stat)+"\n")
+        return result
@@ -0,0 +1,254 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from configparser import ConfigParser
+from importlib import import_module
+import numpy as np
+from imageHelper import ImageHelper
+from rngHelper import RandomStreams
+
+try:
+    from scipy import stats
+except ImportError:  # the racing tuner is not available
+    stats = None
+
+# the settings of a tuning run, whatever the tuned configuration
+RACE_OVERRIDES = {
+    "verbose": "false",
+    "save_artifacts": "false",
+    "save_trajectory": "false",
+    "workers": "1",
+    "tile_rows": "1",
+    "tile_cols": "1",
+    "schedule_total_time": "-1",
+    "telemetry": "",
+    "profile": "false",
+}
+
+# image helpers of the worker process, kept warm from one run to the next
+_image_helpers = {}
+
+
+def _imageHelper(image_file: str, polygon_size: int, mask_cache_size: int, cache_folder: str) -> ImageHelper:
+    key = (image_file, polygon_size, mask_cache_size, cache_folder)
+    if key not in _image_helpers:
+        _image_helpers[key] = ImageHelper(image_file, polygon_size, mask_cache_size, cache_folder or None)
+    return _image_helpers[key]
+
+
+def _runConfiguration(algorithm_name: str, parameters: dict, image_file: str, output_folder: str, id: str,
+                      streams: RandomStreams, checkpoints: list):
+    """
+    runs a configuration on an instance, it is executed in a worker process
+    :return: the best fitness so far at each checkpoint, a fraction of the generations
+    (or of max_time when the run is bounded by time)
+    """
+    config = ConfigParser()
+    config.read_dict({"DEFAULT": parameters})
+    algorithm_module = import_module(algorithm_name)
+    algorithm_config = getattr(algorithm_module, algorithm_name+"Config")(config)
+    os.makedirs(output_folder, exist_ok=True)
+    instance = getattr(algorithm_module, algorithm_name)(
+        algorithm_config, image_file, output_folder, id, streams,
+        _imageHelper(image_file, algorithm_config.polygon_size, algorithm_config.mask_cache_size,
+                     algorithm_config.reference_cache))
+    instance.executive()
+
+    times, fitness = instance.fitnessHistory
+    best = np.minimum.accumulate(fitness)
+    by_time = algorithm_config.max_time is not None and algorithm_config.max_time >= 0 and \
+        algorithm_config.target_solution < 0
+    values = []
+    for fraction in checkpoints:
+        if by_time:
+            idx = max(0, int(np.searchsorted(times, fraction*algorithm_config.max_time, side="right"))-1)
+        else:
+            idx = int(round(fraction*(len(best)-1)))
+        values.append(float(best[idx]))
+    return values
+
+
+class ParameterSpace:
+    def __init__(self, config_class, spec: str):
+        """
+        Initializes the space of the tuned parameters, a subset of the attributes of a configuration class
+        :param config_class: the *Config class of the algorithm, its defaults give the type of the parameters
+        :param spec: space separated "name=low:high" for int and float attributes ("name=low:high:log"
+        for a log scale) or "name=v1,v2,..." for any attribute (e.g. "init_strategy=uniform,lhs,reference")
+        """
+        defaults = config_class(ConfigParser())
+        self.names = []
+        self.domains = []
+        for item in spec.split():
+            name, _, domain = item.partition("=")
+            if name.startswith("_") or name not in defaults.__dict__:
+                raise Exception("Parameter "+name+" not supported")
+            kind = type(getattr(defaults, name))
+            if ":" in domain:
+                if kind not in (int, float):
+                    raise Exception("Range of parameter "+name+" not supported")
+                bounds = domain.split(":")
+                log = len(bounds) > 2 and bounds[2] == "log"
+                self.domains.append((kind, float(bounds[0]), float(bounds[1]), log))
+            else:
+                self.domains.append((kind, domain.split(",")))
+            self.names.append(name)
+
+    def sample(self, n: int, rng: np.random.Generator) -> list:
+        """returns n configurations, dictionaries of the parameter values as configuration strings"""
+        configurations = []
+        for _ in range(n):
+            configuration = {}
+            for name, domain in zip(self.names, self.domains):
+                if len(domain) == 2:
+                    configuration[name] = domain[1][rng.integers(len(domain[1]))]
+                    continue
+                kind, low, high, log = domain
+                if log:
+                    value = math.exp(rng.uniform(math.log(low), math.log(high)))
+                else:
+                    value = rng.uniform(low, high)
+                if kind == int:
+                    configuration[name] = str(int(min(max(round(value), low), high)))
+                else:
+                    configuration[name] = "%.6g" % value
+            configurations.append(configuration)
+        return configurations
+
+    @staticmethod
+    def toString(configuration: dict):
+        """the configuration as a -c argument of main.py"""
+        return " ".join(name+"="+value for name, value in configuration.items())
+
+
+class RacingTuner:
+    def __init__(self, algorithm_name: str, space: ParameterSpace, images: list, output_folder: str,
+                 parameters: dict, streams: RandomStreams, configurations=20, max_experiments=200,
+                 first_test=3, alpha=0.05, checkpoints=4, workers=0):
+        """
+        Initializes a racing tuner (F-race): the sampled configurations run on a sequence of instances,
+        an image and a random stream, and after each instance the configurations that are worse than the
+        best one according to a Friedman test and its Conover post-hoc test (Wilcoxon with two left) are
+        dropped. Each instance is a block, scored by the area under the best-so-far trajectory of its
+        runs (the mean over the checkpoints), so the configurations that are slow to improve are dropped
+        before their final fitness values are enough to separate them
+        :param algorithm_name: the name of the algorithm module and class
+        :param space: the tuned parameters
+        :param images: the image files, the instances cycle over them with a new random stream each time
+        :param output_folder: the folder of the race log and of the runs
+        :param parameters: the fixed parameters of all the runs (the DEFAULT section)
+        :param streams: the random streams of the race
+        :param configurations: the number of sampled configurations
+        :param max_experiments: the maximum number of runs
+        :param first_test: the number of instances before the first test
+        :param alpha: the significance level of the tests
+        :param checkpoints: the number of points of the trajectory in the score of a run
+        :param workers: the processes running the configurations, 0 means one per core
+        """
+        if stats is None:
+            raise Exception("Racing tuner not supported without scipy")
+        if len(images) == 0:
+            raise Exception("Racing tuner needs at least one image")
+        self.algorithm_name = algorithm_name
+        self.space = space
+        self.images = images
+        self.output_folder = output_folder
+        self.parameters = dict(parameters)
+        self.streams = streams
+        self.configurations = configurations
+        self.max_experiments = max_experiments
+        self.first_test = max(1, first_test)
+        self.alpha = alpha
+        self.checkpoints = [(i+1)/checkpoints for i in range(checkpoints)]
+        self.workers = workers if workers > 0 else os.cpu_count()
+        self.experiments = 0
+        self.log = []
+        self.elites = []
+
+    def scores(self, alive: list, results: dict, instances: int) -> np.ndarray:
+        """
+        the score of each alive configuration on each instance, the mean of its best-so-far fitness
+        over the checkpoints: the checkpoints of a run are not independent, an instance is a single block
+        :return: the scores, shape (instances, len(alive))
+        """
+        return np.array([[np.mean(results[(c, j)]) for c in alive] for j in range(instances)])
+
+    def ranks(self, alive: list, results: dict, instances: int) -> np.ndarray:
+        """the rank of each alive configuration in each block, shape (instances, len(alive))"""
+        return np.array([stats.rankdata(block) for block in self.scores(alive, results, instances)])
+
+    def test(self, alive: list, results: dict, instances: int) -> list:
+        """returns the configurations that are not significantly worse than the best one"""
+        ranks = self.ranks(alive, results, instances)
+        b, k = ranks.shape
+        sums = ranks.sum(axis=0)
+        best = int(np.argmin(sums))
+        if k == 2:
+            values = self.scores(alive, results, instances)
+            difference = values[:, 0]-values[:, 1]
+            if np.all(difference == 0):
+                return alive
+            if stats.wilcoxon(difference).pvalue < self.alpha:
+                return [alive[best]]
+            return alive
+
+        a = np.square(ranks).sum()
+        c = b*k*(k+1)**2/4
+        if a == c or stats.friedmanchisquare(*ranks.T).pvalue >= self.alpha:
+            return alive
+        dof = (b-1)*(k-1)
+        critical = stats.t.ppf(1-self.alpha/2, dof) * \
+            math.sqrt(2*(b*a-np.square(sums).sum())/dof)
+        return [config for config, s in zip(alive, sums) if s-sums[best] <= critical]
+
+    def executive(self):
+        """
+        races the configurations until one is left, the experiments are used up
+        or the next instance does not fit in the budget
+        :return: the best configuration and the configurations still alive, best first
+        """
+        configurations = self.space.sample(self.configurations, self.streams.generator)
+        alive = list(range(len(configurations)))
+        results = {}
+        instance = 0
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            while len(alive) > 1 and self.experiments+len(alive) <= self.max_experiments:
+                image_file = self.images[instance % len(self.images)]
+                # all the configurations run on an instance with the same random stream
+                stream = self.streams.child(instance)
+                futures = {}
+                for c in alive:
+                    parameters = {**self.parameters, **configurations[c], **RACE_OVERRIDES}
+                    folder = os.path.join(self.output_folder, "runs", str(c), str(instance))
+                    futures[c] = pool.submit(_runConfiguration, self.algorithm_name, parameters, image_file,
+                                             folder, "race"+str(c), stream, self.checkpoints)
+                for c in alive:
+                    results[(c, instance)] = futures[c].result()
+                self.experiments += len(alive)
+                instance += 1
+
+                survivors = alive
+                if instance >= self.first_test:
+                    survivors = self.test(alive, results, instance)
+                self.log.append((instance, os.path.basename(image_file), len(alive), self.experiments,
+                                 [c for c in alive if c not in survivors]))
+                alive = survivors
+
+        # the alive configurations by mean rank, the mean of their final fitness is reported
+        if instance > 0 and len(alive) > 1:
+            order = np.argsort(self.ranks(alive, results, instance).mean(axis=0), kind="stable")
+            alive = [alive[i] for i in order]
+        self.elites = [(configurations[c],
+                        float(np.mean([results[(c, j)][-1] for j in range(instance)])) if instance > 0 else math.nan)
+                       for c in alive]
+        return configurations[alive[0]], [configurations[c] for c in alive]
+
+    def toString(self):
+        s = "instance\timage\talive\texperiments\teliminated\n"
+        for instance, image, alive, experiments, eliminated in self.log:
+            s = s+str(instance)+"\t"+image+"\t"+str(alive)+"\t"+str(experiments) + \
+                "\t"+",".join(str(c) for c in eliminated)+"\n"
+        s = s+"\nelites (mean final fitness, configuration):\n"
+        for configuration, fitness in self.elites:
+            s = s+str(fitness)+"\t"+ParameterSpace.toString(configuration)+"\n"
+        return s
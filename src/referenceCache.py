@@ -0,0 +1,46 @@
+import hashlib
+import os
+import numpy as np
+
+# part of the key, to be increased when the layout or the computation of the cached arrays changes
+REFERENCE_CACHE_VERSION = 1
+
+
+class ReferenceCache:
+    def __init__(self, folder: str, imagePath: str):
+        """
+        Initializes the on-disk cache of the arrays derived from a reference image: the decoded image
+        and the precomputed references and statistics, stored as .npy files in a sub folder named after
+        the hash of the image content. The arrays are loaded read-only with memory mapping, so the runs
+        on the same image start without decoding it and the processes share the same physical pages
+        :param folder: the root folder of the cache, shared by all the images
+        :param imagePath: the path of the reference image
+        """
+        digest = hashlib.sha1()
+        with open(imagePath, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        digest.update(("v"+str(REFERENCE_CACHE_VERSION)).encode())
+        self.folder = os.path.join(folder, digest.hexdigest())
+        self.hits = 0
+        self.misses = 0
+
+    def array(self, name: str, compute):
+        """
+        returns the cached array, computed and stored on the first call
+        :param name: the name of the array, it includes the settings the array depends on
+        :param compute: a function returning the array
+        """
+        path = os.path.join(self.folder, name+".npy")
+        if os.path.exists(path):
+            self.hits += 1
+            return np.load(path, mmap_mode="r")
+
+        self.misses += 1
+        os.makedirs(self.folder, exist_ok=True)
+        # written aside and renamed, so concurrent processes never load a partial file
+        temporary = path+"."+str(os.getpid())+".tmp"
+        with open(temporary, 'wb') as f:
+            np.save(f, np.ascontiguousarray(compute()))
+        os.replace(temporary, path)
+        return np.load(path, mmap_mode="r")
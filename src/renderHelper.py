@@ -0,0 +1,348 @@
+from collections import OrderedDict
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        # numba is optional: without it the kernels below are never jitted
+        # and RenderHelper falls back to the pure NumPy path
+        def decorator(fun):
+            return fun
+        return decorator
+
+
+RENDER_ERROR_SQUARED = 0
+RENDER_ERROR_ABSOLUTE = 1
+
+
+@njit(cache=True)
+def _fillPolygon(vertices, colour, buffer):
+    """
+    composites a single polygon into the buffer using an even-odd scanline fill.
+    A pixel (x, y) is covered when xl <= x < xr for a pair of edge crossings (xl, xr) of row y,
+    rows are covered in the half-open range [ymin, ymax)
+    """
+    height = buffer.shape[0]
+    width = buffer.shape[1]
+    k = vertices.shape[0]
+    ymin = vertices[0, 1]
+    ymax = vertices[0, 1]
+    for i in range(1, k):
+        ymin = min(ymin, vertices[i, 1])
+        ymax = max(ymax, vertices[i, 1])
+    ymin = max(ymin, 0)
+    ymax = min(ymax, height)
+
+    alpha = colour[3] / 255.0
+    crossings = np.empty(k, np.float64)
+    for y in range(ymin, ymax):
+        n = 0
+        for i in range(k):
+            xa = vertices[i, 0]
+            ya = vertices[i, 1]
+            xb = vertices[(i + 1) % k, 0]
+            yb = vertices[(i + 1) % k, 1]
+            if (ya <= y and y < yb) or (yb <= y and y < ya):
+                crossings[n] = xa + (y - ya) * (xb - xa) / (yb - ya)
+                n += 1
+
+        # insertion sort, n is at most the number of vertices
+        for i in range(1, n):
+            value = crossings[i]
+            j = i - 1
+            while j >= 0 and crossings[j] > value:
+                crossings[j + 1] = crossings[j]
+                j -= 1
+            crossings[j + 1] = value
+
+        for i in range(0, n - 1, 2):
+            xl = max(int(np.ceil(crossings[i])), 0)
+            xr = min(int(np.ceil(crossings[i + 1])), width)
+            for x in range(xl, xr):
+                for c in range(3):
+                    buffer[y, x, c] += (colour[c] - buffer[y, x, c]) * alpha
+
+
+@njit(cache=True)
+def _renderPolygons(vertices, colours, buffer):
+    buffer[:] = 0
+    for p in range(vertices.shape[0]):
+        _fillPolygon(vertices[p], colours[p], buffer)
+
+
+@njit(cache=True)
+def _compositeMask(buffer, row, column, mask, colour):
+    alpha = colour[3] / 255.0
+    for y in range(mask.shape[0]):
+        for x in range(mask.shape[1]):
+            if mask[y, x]:
+                for c in range(3):
+                    buffer[row + y, column + x, c] += \
+                        (colour[c] - buffer[row + y, column + x, c]) * alpha
+
+
+@njit(cache=True)
+def _fusedRenderError(vertices, colours, buffer, reference, mode):
+    """renders all polygons into the scratch buffer and reduces the error against the reference in one call"""
+    _renderPolygons(vertices, colours, buffer)
+    return _reduceError(buffer, reference, mode)
+
+
+@njit(cache=True)
+def _reduceError(buffer, reference, mode):
+    error = 0.0
+    for y in range(buffer.shape[0]):
+        for x in range(buffer.shape[1]):
+            for c in range(3):
+                d = np.float64(buffer[y, x, c]) - reference[y, x, c]
+                if mode == RENDER_ERROR_SQUARED:
+                    error += d * d
+                else:
+                    error += abs(d)
+    return error
+
+
+def polygonMask(vertices, width, height):
+    """
+    computes the coverage mask of a polygon with the same fill rule of _fillPolygon
+    :param vertices: integer pixel vertices of the polygon, shape (k, 2)
+    :return: (row, column, mask) where mask is a boolean array placed at (row, column),
+    or None if the polygon does not cover any pixel
+    """
+    r0 = max(int(vertices[:, 1].min()), 0)
+    r1 = min(int(vertices[:, 1].max()), height)
+    c0 = max(int(vertices[:, 0].min()), 0)
+    c1 = min(int(vertices[:, 0].max()), width)
+    if r0 >= r1 or c0 >= c1:
+        return None
+
+    ys = np.arange(r0, r1, dtype=np.float64)[:, None]
+    xs = np.arange(c0, c1, dtype=np.float64)[None, :]
+    count = np.zeros((r1 - r0, c1 - c0), np.uint8)
+    k = vertices.shape[0]
+    for i in range(k):
+        xa, ya = float(vertices[i, 0]), float(vertices[i, 1])
+        xb, yb = float(vertices[(i + 1) % k, 0]), float(vertices[(i + 1) % k, 1])
+        if ya == yb:
+            continue
+        rows = ((ya <= ys) & (ys < yb)) | ((yb <= ys) & (ys < ya))
+        crossing = xa + (ys - ya) * (xb - xa) / (yb - ya)
+        count += rows & (crossing <= xs)
+    mask = (count & 1).astype(bool)
+    if not mask.any():
+        return None
+    return r0, c0, mask
+
+
+class MaskCache:
+    def __init__(self, capacity: int):
+        """
+        Initializes a bounded LRU cache of polygon coverage masks
+        :param capacity: the maximum number of masks kept in memory
+        """
+        self.capacity = capacity
+        self.__masks = OrderedDict()
+        self.__bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.__masks)
+
+    @property
+    def hitRate(self):
+        total = self.hits + self.misses
+        return self.hits/total if total > 0 else 0.0
+
+    @property
+    def memoryUsage(self):
+        """the number of bytes used by the cached masks"""
+        return self.__bytes
+
+    def get(self, vertices: np.ndarray, width: int, height: int):
+        """
+        returns the coverage of the polygon, see polygonMask, computing it on a miss
+        :param vertices: integer pixel vertices of the polygon, shape (k, 2)
+        """
+        key = vertices.tobytes()
+        covered = self.__masks.get(key, False)
+        if covered is not False:
+            self.hits += 1
+            self.__masks.move_to_end(key)
+            return covered
+
+        self.misses += 1
+        covered = polygonMask(vertices, width, height)
+        self.__masks[key] = covered
+        self.__bytes += MaskCache.__sizeOf(covered)
+        while len(self.__masks) > self.capacity:
+            _, old = self.__masks.popitem(last=False)
+            self.__bytes -= MaskCache.__sizeOf(old)
+        return covered
+
+    def clear(self):
+        self.__masks.clear()
+        self.__bytes = 0
+
+    def toString(self):
+        return "entries="+str(len(self))+" capacity="+str(self.capacity) + \
+            " hits="+str(self.hits)+" misses="+str(self.misses) + \
+            " hit_rate="+str(self.hitRate)+" memory_bytes="+str(self.memoryUsage)
+
+    @staticmethod
+    def __sizeOf(covered):
+        return 0 if covered is None else covered[2].nbytes
+
+
+class RenderHelper:
+    def __init__(self, reference: np.ndarray, polygonSize=3, useNumba=True, maskCacheSize=0):
+        """
+        Initializes a renderer that composites polygons into a reusable scratch buffer
+        :param reference: the reference image as an RGB array of shape (height, width, 3)
+        :param polygonSize: the number of vertices on the polygons
+        :param useNumba: use the jitted scanline kernel when numba is installed
+        :param maskCacheSize: when greater than zero, coverage masks of the last maskCacheSize
+        distinct polygon geometries are cached and rendering only composites colour and alpha
+        """
+        self.height, self.width = reference.shape[0], reference.shape[1]
+        self.polygonSize = polygonSize
+        self.chunkSize = polygonSize * 2 + 4  # (x,y) per vertex + (RGBA)
+        self.useNumba = useNumba and NUMBA_AVAILABLE
+
+        self.reference = np.ascontiguousarray(reference[:, :, :3], np.float32)
+        self.__buffer = np.zeros((self.height, self.width, 3), np.float32)
+        self.__diff = np.zeros((self.height, self.width, 3), np.float32)
+        self.maskCache = MaskCache(maskCacheSize) if maskCacheSize > 0 else None
+
+    def decode(self, polygonData):
+        """
+        converts polygon data to integer pixel vertices and 0-255 colours,
+        truncating exactly as ImageHelper.polygonDataToImage does
+        :return: (vertices, colours) with shapes (n, polygonSize, 2) and (n, 4)
+        """
+        k = self.polygonSize
+        if isinstance(polygonData, np.ndarray) and polygonData.dtype.kind == 'u':
+            # quantized genome, already in pixels and 0-255 colours
+            data = polygonData.reshape(-1, self.chunkSize)
+            vertices = np.ascontiguousarray(
+                data[:, :2 * k].reshape(-1, k, 2), np.int32)
+            colours = np.ascontiguousarray(data[:, 2 * k:], np.float32)
+            return vertices, colours
+
+        data = np.asarray(polygonData, np.float64).reshape(-1, self.chunkSize)
+        vertices = np.empty((data.shape[0], k, 2), np.int32)
+        vertices[:, :, 0] = (data[:, 0:2 * k:2] * self.width).astype(np.int32)
+        vertices[:, :, 1] = (data[:, 1:2 * k:2] * self.height).astype(np.int32)
+        colours = (data[:, 2 * k:] * 255).astype(np.int32).astype(np.float32)
+        return vertices, colours
+
+    def render(self, polygonData):
+        """
+        composites the polygons into the scratch buffer.
+        The returned array is reused by the next call, copy it to keep it
+        :return: the scratch buffer, float32 RGB of shape (height, width, 3)
+        """
+        vertices, colours = self.decode(polygonData)
+        buffer = self.__buffer
+        if self.useNumba and self.maskCache is None:
+            _renderPolygons(vertices, colours, buffer)
+        else:
+            buffer.fill(0)
+            self._composite(vertices, colours, buffer)
+        return buffer
+
+    def _composite(self, vertices, colours, buffer):
+        for p in range(vertices.shape[0]):
+            if self.maskCache is not None:
+                covered = self.maskCache.get(
+                    vertices[p], self.width, self.height)
+            else:
+                covered = polygonMask(vertices[p], self.width, self.height)
+            if covered is None:
+                continue
+            r, c, mask = covered
+            if self.useNumba:
+                _compositeMask(buffer, r, c, mask, colours[p])
+                continue
+            region = buffer[r:r + mask.shape[0], c:c + mask.shape[1]]
+            pixels = region[mask]
+            region[mask] = pixels + \
+                (colours[p, :3] - pixels) * (colours[p, 3] / 255.0)
+
+    def refitColours(self, polygonData, sweeps=2):
+        """
+        With the vertices and the transparencies fixed, the composited image is linear in the RGB
+        colours: each polygon adds its colour weighted by its alpha times the transmittance of the
+        polygons drawn above it. The colours minimizing the squared error are refitted by
+        coordinate descent, one least-squares update per polygon over its coverage
+        :param sweeps: the number of passes over all the polygons
+        :return: the refitted 0-255 colours, float array of shape (n, 3)
+        """
+        vertices, colours = self.decode(polygonData)
+        n = vertices.shape[0]
+        alpha = colours[:, 3].astype(np.float64) / 255.0
+
+        # visible weight of each polygon, from the topmost one down
+        transmittance = np.ones((self.height, self.width), np.float64)
+        regions = [None] * n
+        for p in range(n - 1, -1, -1):
+            if alpha[p] <= 0:
+                continue
+            if self.maskCache is not None:
+                covered = self.maskCache.get(vertices[p], self.width, self.height)
+            else:
+                covered = polygonMask(vertices[p], self.width, self.height)
+            if covered is None:
+                continue
+            r, c, mask = covered
+            local = transmittance[r:r + mask.shape[0], c:c + mask.shape[1]]
+            regions[p] = (r, c, np.where(mask, local * alpha[p], 0.0))
+            local[mask] *= 1.0 - alpha[p]
+
+        fitted = colours[:, :3].astype(np.float64)
+        image = np.zeros((self.height, self.width, 3), np.float64)
+        for p in range(n):
+            if regions[p] is not None:
+                r, c, weight = regions[p]
+                image[r:r + weight.shape[0], c:c + weight.shape[1]] += weight[..., None] * fitted[p]
+
+        for _ in range(sweeps):
+            for p in range(n):
+                if regions[p] is None:
+                    continue
+                r, c, weight = regions[p]
+                norm = float((weight * weight).sum())
+                if norm <= 0:
+                    continue
+                region = image[r:r + weight.shape[0], c:c + weight.shape[1]]
+                reference = self.reference[r:r + weight.shape[0], c:c + weight.shape[1]]
+                # residual of the image without this polygon's colour
+                residual = reference - region + weight[..., None] * fitted[p]
+                value = np.clip((weight[..., None] * residual).sum(axis=(0, 1)) / norm, 0, 255)
+                region += weight[..., None] * (value - fitted[p])
+                fitted[p] = value
+        return fitted
+
+    def getError(self, polygonData, mode=RENDER_ERROR_SQUARED):
+        """
+        renders the polygons and computes the sum of the squared (or absolute) error
+        against the reference without materializing an image
+        :param mode: RENDER_ERROR_SQUARED or RENDER_ERROR_ABSOLUTE
+        """
+        if self.useNumba and self.maskCache is None:
+            vertices, colours = self.decode(polygonData)
+            return _fusedRenderError(vertices, colours, self.__buffer, self.reference, mode)
+
+        buffer = self.render(polygonData)
+        if self.useNumba:
+            return _reduceError(buffer, self.reference, mode)
+        diff = np.subtract(buffer, self.reference, out=self.__diff)
+        if mode == RENDER_ERROR_SQUARED:
+            np.square(diff, out=diff)
+        else:
+            np.abs(diff, out=diff)
+        return float(diff.sum(dtype=np.float64))
@@ -0,0 +1,65 @@
+import sys
+import getopt
+import os
+from imageHelper import ImageHelper
+from trajectoryHelper import TrajectoryReader
+
+
+def main(argc, argv):
+    opts, args = getopt.getopt(argv, "f:i:g:o:l", [
+        "trajectory_file=",
+        "image_file=",
+        "generation=",
+        "output_folder=",
+        "list"
+    ])
+
+    TRAJECTORY_FILE = None
+    IMAGE_FILE = None
+    GENERATIONS = []
+    OUTPUT_FOLDER = "."
+    LIST = False
+
+    for opt, arg in opts:
+        if opt in ("-f", "--trajectory_file"):
+            TRAJECTORY_FILE = arg
+        elif opt in ("-i", "--image_file"):
+            IMAGE_FILE = arg
+        elif opt in ("-g", "--generation"):
+            GENERATIONS = [int(x) for x in arg.split(',')]
+        elif opt in ("-o", "--output_folder"):
+            OUTPUT_FOLDER = arg
+        elif opt in ("-l", "--list"):
+            LIST = True
+
+    if TRAJECTORY_FILE == None:
+        raise Exception("I don't know which trajectory I have to replay!")
+
+    trajectory = TrajectoryReader(TRAJECTORY_FILE)
+    if LIST:
+        for generation, fitness in zip(trajectory.generations, trajectory.fitness):
+            print(str(generation)+"\t"+str(fitness))
+
+    if len(GENERATIONS) == 0:
+        return
+    if IMAGE_FILE == None:
+        raise Exception("I don't know which reference image I have to use!")
+
+    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+    image_helper = ImageHelper(IMAGE_FILE, trajectory.polygon_size)
+    for generation in GENERATIONS:
+        # the best solution at a generation is the last one saved before it
+        idx = trajectory.find(generation)
+        polygonData = trajectory.genome(idx)
+        name = os.path.join(OUTPUT_FOLDER, str(generation))
+        image = image_helper.polygonDataToImage(polygonData)
+        image_helper.saveImage(polygonData, name+"_compare.png",
+                               str(trajectory.fitness[idx]), image)
+        image.save(name+"_generated.bmp", bitmap_format='bmp')
+        print(str(generation)+"->"+str(trajectory.generations[idx]) +
+              "\t"+str(trajectory.fitness[idx]))
+
+
+if __name__ == "__main__":
+    v = sys.argv[1:]
+    main(len(v), v)
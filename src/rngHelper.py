@@ -0,0 +1,31 @@
+import random
+import numpy as np
+
+
+class RandomStreams:
+    def __init__(self, seed=None, sequence: np.random.SeedSequence = None):
+        """
+        Initializes a node of a tree of independent random streams derived from a numpy SeedSequence.
+        Child streams (one per image, per tile worker, per island...) are addressed by a key, so the
+        stream of a child does not depend on the order in which children are created
+        :param seed: the root seed, None to draw it from the operating system
+        :param sequence: the seed sequence of this node, used instead of seed
+        """
+        self.sequence = sequence if sequence is not None else np.random.SeedSequence(seed)
+        self.generator = np.random.Generator(np.random.PCG64(self.sequence))
+
+    @staticmethod
+    def fromGlobal():
+        """a root stream seeded from the random module, so that random.seed still applies"""
+        return RandomStreams(random.getrandbits(64))
+
+    def child(self, key: int):
+        """returns the child stream with the given key"""
+        sequence = np.random.SeedSequence(self.sequence.entropy,
+                                          spawn_key=self.sequence.spawn_key + (key,),
+                                          pool_size=self.sequence.pool_size)
+        return RandomStreams(sequence=sequence)
+
+    def children(self, n: int) -> list:
+        """returns the child streams with the keys 0..n-1"""
+        return [self.child(i) for i in range(n)]
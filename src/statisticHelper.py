@@ -1,9 +1,16 @@
 import time
+from profileHelper import peakRss
 
 
 class StatisticHelper:
-    def __init__(self, filename: str, verbose=True) -> None:
+    def __init__(self, filename: str, verbose=True, metrics=None, rss=False) -> None:
+        """
+        :param metrics: names of the secondary metrics written as extra columns
+        :param rss: adds the peak resident set size of the process (MB) as the last column
+        """
         self.__filename = filename
+        self.__metrics = list(metrics) if metrics is not None else []
+        self.__rss = rss
         self.__file = open(filename, 'w')
         self.__current_gen = 0
         self.__current_fitness = None
@@ -11,6 +18,8 @@ class StatisticHelper:
         self.__current_time = time.time()
         self.__sum_time = 0
         self.__enable_print = verbose
+        self.__history_time = []
+        self.__history_fitness = []
 
     @property
     def filename(self):
@@ -36,6 +45,33 @@ class StatisticHelper:
     def set_enablePrint(self, value: bool):
         self.__enable_print = value
 
+    @property
+    def history(self):
+        """the execution time and the fitness of each record"""
+        return list(self.__history_time), list(self.__history_fitness)
+
+    def relativeImprovement(self, since_time: float) -> float:
+        """
+        returns the relative fitness decrease from the last record at or before since_time
+        (execution time, the first record when there is none) to the current record,
+        1 when there is no record yet
+        """
+        if len(self.__history_time) == 0:
+            return 1.0
+        idx = 0
+        for i, t in enumerate(self.__history_time):
+            if t > since_time:
+                break
+            idx = i
+        since_fitness = self.__history_fitness[idx]
+        if since_fitness == 0:
+            return 0.0
+        return (since_fitness-self.__current_fitness)/abs(since_fitness)
+
+    def skipTime(self, seconds: float):
+        """excludes seconds (e.g. a paused run) from the time of the next record"""
+        self.__current_time = self.__current_time+seconds
+
     @property
     def countRecords(self):
         return self.countRecords
@@ -49,20 +85,25 @@ class StatisticHelper:
         self.__file = None
 
     def addRecord(self, fitness: float,  fitness_worse: float,
-                  fitness_mean: float, fitness_std: float, delta=0):
+                  fitness_mean: float, fitness_std: float, delta=0, metrics=None):
 
         self.__current_fitness = fitness
         if self.__current_gen > 0:
             t = time.time()-self.__current_time-delta
         else:
             t = 0
-            self.__file.write(
-                "iteration\tfitness\ttime\ttotal_time\tfitness_worse\tfitness_mean\tfitness_std\n")
+            self.__file.write("\t".join(["iteration", "fitness", "time", "total_time", "fitness_worse",
+                                         "fitness_mean", "fitness_std"]+self.__metrics +
+                                        (["peak_rss_mb"] if self.__rss else []))+"\n")
         self.__sum_time = self.__sum_time+t
+        self.__history_time.append(self.__sum_time)
+        self.__history_fitness.append(fitness)
 
         s = '\t'.join([str(self.__current_gen), str(fitness),
                       str(t), str(self.__sum_time), str(fitness_worse),
-                      str(fitness_mean), str(fitness_std)])
+                      str(fitness_mean), str(fitness_std)] +
+                      [str(metrics.get(m, "nan")) if metrics is not None else "nan" for m in self.__metrics] +
+                      ([str(peakRss())] if self.__rss else []))
         self.__file.write(s+"\n")
         self.__file.flush()
 
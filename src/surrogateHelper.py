@@ -0,0 +1,81 @@
+import numpy as np
+
+
+class SurrogateModel:
+    def __init__(self, num_params: int, features=128, ridge=1.0, capacity=1000, scale=None, seed=None):
+        """
+        Initializes an online ridge regressor over random Fourier features of the genome,
+        used to predict the fitness of individuals before rendering them
+        :param num_params: the length of a genome
+        :param features: the number of random features
+        :param ridge: the L2 regularization of the regression
+        :param capacity: the number of most recent evaluated individuals used for training
+        :param scale: divides every gene before the projection (the gene upper bound in int mode)
+        """
+        rng = np.random.default_rng(seed)
+        self.features = features
+        self.ridge = ridge
+        self.capacity = capacity
+        self.scale = np.ones(num_params) if scale is None else np.asarray(
+            scale, np.float64)
+        self.__projection = rng.normal(0.0, 1.0, (num_params, features))
+        self.__phase = rng.uniform(0, 2*np.pi, features)
+        self.__x = np.zeros((capacity, features))
+        self.__y = np.zeros(capacity)
+        self.__count = 0
+        self.__weights = None
+        self.__bias = 0.0
+        self.accuracy = None
+
+    @property
+    def length(self):
+        return min(self.__count, self.capacity)
+
+    @property
+    def ready(self):
+        return self.__weights is not None
+
+    def transform(self, genomes):
+        """maps a list of genomes to the random features, one row per genome"""
+        data = np.asarray([np.asarray(g, np.float64) for g in genomes]) / self.scale
+        # random Fourier features of an RBF kernel: the implied similarity of two
+        # genomes only depends on their delta, scaled by the genome length
+        z = (data - 0.5) @ self.__projection / np.sqrt(data.shape[1] / 12.0)
+        return np.sqrt(2.0 / self.features) * np.cos(z + self.__phase)
+
+    def add(self, genomes, fitnesses):
+        """adds evaluated individuals to the training buffer (oldest ones are overwritten)"""
+        if len(genomes) == 0:
+            return
+        x = self.transform(genomes)
+        for i in range(len(x)):
+            pos = self.__count % self.capacity
+            self.__x[pos] = x[i]
+            self.__y[pos] = fitnesses[i]
+            self.__count += 1
+
+    def fit(self):
+        n = self.length
+        if n < 2:
+            return
+        x = self.__x[:n]
+        y = self.__y[:n]
+        self.__bias = y.mean()
+        a = x.T @ x + self.ridge * np.eye(self.features)
+        self.__weights = np.linalg.solve(a, x.T @ (y - self.__bias))
+
+    def predict(self, genomes):
+        return self.transform(genomes) @ self.__weights + self.__bias
+
+    def validate(self, predicted, fitnesses):
+        """
+        stores, as accuracy, the Spearman rank correlation between predicted and exact fitness
+        :return: the accuracy
+        """
+        if len(fitnesses) < 3:
+            return self.accuracy
+        rp = np.argsort(np.argsort(predicted))
+        rf = np.argsort(np.argsort(fitnesses))
+        corr = np.corrcoef(rp, rf)[0, 1]
+        self.accuracy = 0.0 if np.isnan(corr) else float(corr)
+        return self.accuracy
@@ -0,0 +1,160 @@
+import math
+import os
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TELEMETRY_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+TELEMETRY_PREFIX = "gaml_"
+
+# name: (type, help) of the metrics published by the solvers
+TELEMETRY_METRICS = {
+    "running": ("gauge", "1 while the solver is running"),
+    "generation": ("gauge", "current generation"),
+    "elapsed_seconds": ("gauge", "execution time of the run"),
+    "best_fitness": ("gauge", "fitness of the best solution of the last generation"),
+    "mean_fitness": ("gauge", "mean fitness of the last generation"),
+    "worst_fitness": ("gauge", "worst fitness of the last generation"),
+    "fitness_std": ("gauge", "standard deviation of the fitness of the last generation"),
+    "active_polygons": ("gauge", "polygons currently optimized"),
+    "evaluations_total": ("counter", "objective function evaluations"),
+    "evaluations_per_second": ("gauge", "evaluations per second since the previous generation"),
+    "cache_hits_total": ("counter", "hits of the cache"),
+    "cache_misses_total": ("counter", "misses of the cache"),
+    "cache_hit_rate": ("gauge", "hit rate of the cache"),
+    "parameter": ("gauge", "current value of a dynamic parameter"),
+    "phase_seconds_total": ("counter", "time spent in each phase of the iterations"),
+}
+
+
+class TelemetrySource:
+    def __init__(self, labels: dict):
+        """
+        The metrics of one solver. The solver publishes a new snapshot, a list of
+        (name, extra labels, value), by replacing the reference: the scrapes read
+        whatever snapshot is current, the solver never waits for them
+        :param labels: the labels added to all the metrics of the solver
+        """
+        self.labels = dict(labels)
+        self.snapshot = []
+
+    def publish(self, snapshot: list):
+        self.snapshot = snapshot
+
+
+class TelemetryServer:
+    __servers = {}
+    __servers_lock = threading.Lock()
+
+    def __init__(self, address: str):
+        """
+        Serves the metrics of the registered solvers in the Prometheus text format
+        from a daemon thread, on GET of any path
+        :param address: "host:port", "port" (bound to 127.0.0.1) or "unix:/path/to/socket"
+        """
+        self.address = address
+        self.__sources = []
+        self.__sources_lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = server.toString().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", TELEMETRY_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def address_string(self):
+                # the client address of a unix socket is empty
+                return str(self.client_address[0]) if self.client_address else "unix"
+
+            def log_message(self, format, *args):
+                pass
+
+        if address.startswith("unix:"):
+            path = address[len("unix:"):]
+            if os.path.exists(path):
+                os.remove(path)
+            self.__httpd = _UnixHTTPServer(path, Handler)
+        else:
+            host, _, port = address.rpartition(":")
+            self.__httpd = ThreadingHTTPServer((host or "127.0.0.1", int(port)), Handler)
+        self.__thread = threading.Thread(target=self.__httpd.serve_forever,
+                                         name="telemetry", daemon=True)
+        self.__thread.start()
+
+    @staticmethod
+    def get(address: str):
+        """returns the server listening on the address, started on the first call"""
+        with TelemetryServer.__servers_lock:
+            server = TelemetryServer.__servers.get(address)
+            if server is None:
+                server = TelemetryServer(address)
+                TelemetryServer.__servers[address] = server
+            return server
+
+    @staticmethod
+    def shutdownAll():
+        with TelemetryServer.__servers_lock:
+            for server in TelemetryServer.__servers.values():
+                server.shutdown()
+            TelemetryServer.__servers = {}
+
+    def register(self, labels: dict) -> TelemetrySource:
+        """
+        adds a solver, a source registered with the same labels is replaced
+        so that a new run of the same image does not repeat its metrics
+        """
+        source = TelemetrySource(labels)
+        with self.__sources_lock:
+            # the list is replaced, never modified, as it is read by the scrapes without lock
+            self.__sources = [s for s in self.__sources if s.labels != source.labels] + [source]
+        return source
+
+    def shutdown(self):
+        self.__httpd.shutdown()
+        self.__httpd.server_close()
+        if self.address.startswith("unix:") and os.path.exists(self.address[len("unix:"):]):
+            os.remove(self.address[len("unix:"):])
+
+    def toString(self):
+        samples = {}
+        for source in self.__sources:
+            for name, labels, value in source.snapshot:
+                samples.setdefault(name, []).append((dict(source.labels, **labels), value))
+
+        lines = []
+        for name, (kind, description) in TELEMETRY_METRICS.items():
+            if name not in samples:
+                continue
+            metric = TELEMETRY_PREFIX+name
+            lines.append("# HELP "+metric+" "+description)
+            lines.append("# TYPE "+metric+" "+kind)
+            for labels, value in samples[name]:
+                lines.append(metric+_formatLabels(labels)+" "+_formatValue(value))
+        return "\n".join(lines)+"\n"
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _formatLabels(labels: dict):
+    if len(labels) == 0:
+        return ""
+    pairs = []
+    for key, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+        pairs.append(key+"=\""+value+"\"")
+    return "{"+",".join(pairs)+"}"
+
+
+def _formatValue(value):
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
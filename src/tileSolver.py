@@ -0,0 +1,148 @@
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+import copy
+import os
+from algorithmBase import AlgorithmBase, AlgorithmConfigBase
+from genomeHelper import GenomeHelper
+from rngHelper import RandomStreams
+import numpy as np
+
+
+def _solveTile(algorithm_name: str, config: AlgorithmConfigBase, image_file: str, output_folder: str, id: str,
+               streams: RandomStreams):
+    """runs the algorithm on a single tile, it is executed in a worker process"""
+    algorithm_module = import_module(algorithm_name)
+    algorithm_class = getattr(algorithm_module, algorithm_name)
+    instance: AlgorithmBase = algorithm_class(
+        config, image_file, output_folder, id, streams)
+    result = instance.executive()
+    fitness = instance.saveResult("final_result", result)
+
+    # the result is sent back as float polygon data relative to the tile
+    if GenomeHelper.isQuantized(result):
+        return instance.genome_helper.dequantize(result), fitness
+    return [float(x) for x in result], fitness
+
+
+class TileSolver:
+    def __init__(self, algorithm: AlgorithmBase, algorithm_name: str):
+        """
+        Initializes the tiled mode: the reference image is split into tile_rows x tile_cols
+        overlapping tiles, each tile is solved by an independent run of the algorithm with a share
+        of the polygon budget and the results are stitched into a single global genome
+        :param algorithm: the algorithm instance on the whole image, used for the optional refinement
+        :param algorithm_name: the name of the algorithm module and class
+        """
+        self.algorithm = algorithm
+        self.algorithm_name = algorithm_name
+        self.config = algorithm.config
+        self.width = algorithm.image_helper.width
+        self.height = algorithm.image_helper.height
+        self.chunkSize = self.config.polygon_size * 2 + 4  # (x,y) per vertex + (RGBA)
+
+    def tiles(self):
+        """
+        :return: a list of boxes (left, upper, right, lower) in pixels, overlap included
+        """
+        config = self.config
+        boxes = []
+        for r in range(config.tile_rows):
+            for c in range(config.tile_cols):
+                left = c * self.width // config.tile_cols
+                right = (c + 1) * self.width // config.tile_cols
+                upper = r * self.height // config.tile_rows
+                lower = (r + 1) * self.height // config.tile_rows
+                ox = int(round((right - left) * config.tile_overlap))
+                oy = int(round((lower - upper) * config.tile_overlap))
+                boxes.append((max(left - ox, 0), max(upper - oy, 0),
+                              min(right + ox, self.width), min(lower + oy, self.height)))
+        return boxes
+
+    def shares(self, tiles: int):
+        """
+        :return: the number of polygons of each tile, the budget is shared out exactly, so with
+        fewer polygons than tiles the last tiles get none
+        """
+        return [len(share) for share in np.array_split(np.arange(self.config.number_of_polygon), tiles)]
+
+    def stitch(self, boxes, solutions):
+        """
+        maps the tile solutions to the whole image and joins them in a single genome,
+        padded with transparent polygons up to number_of_polygon
+        """
+        k = self.config.polygon_size
+        genome = []
+        for (left, upper, right, lower), solution in zip(boxes, solutions):
+            tile_width = right - left
+            tile_height = lower - upper
+            for start in range(0, len(solution), self.chunkSize):
+                poly = list(solution[start:start + self.chunkSize])
+                for v in range(k):
+                    poly[2 * v] = (left + poly[2 * v] * tile_width) / self.width
+                    poly[2 * v + 1] = (upper + poly[2 * v + 1]
+                                       * tile_height) / self.height
+                genome += poly
+
+        missing = self.algorithm.num_of_params - len(genome)
+        if missing < 0:
+            raise Exception("Tile solutions longer than number_of_polygon not supported")
+        if missing > 0:
+            genome += [0.0] * missing
+        return genome
+
+    def executive(self):
+        config = self.config
+        boxes = self.tiles()
+        folder = os.path.join(self.algorithm.output_folder, "tiles")
+        os.makedirs(folder, exist_ok=True)
+
+        tile_config: AlgorithmConfigBase = copy.copy(config)
+        tile_config.tile_rows = 1
+        tile_config.tile_cols = 1
+        tile_config.tile_refine_generations = 0
+        # the tiles run in worker processes, the telemetry address belongs to this one
+        tile_config.telemetry = ""
+
+        # each tile has its own child stream, the results do not depend on the number of tile workers
+        tile_streams = self.algorithm.streams.children(len(boxes))
+        # each tile gets an equal share of the polygon budget, the tiles without polygons are not solved
+        shares = self.shares(len(boxes))
+        boxes = [box for box, share in zip(boxes, shares) if share > 0]
+        tasks = []
+        for i, box in enumerate(boxes):
+            share_config: AlgorithmConfigBase = copy.copy(tile_config)
+            share_config.number_of_polygon = shares[i]
+            tile_folder = os.path.join(folder, str(i))
+            os.makedirs(tile_folder, exist_ok=True)
+            tile_file = os.path.join(tile_folder, "tile.png")
+            self.algorithm.image_helper.refImage.crop(box).save(tile_file)
+            tasks.append((self.algorithm_name, share_config, tile_file,
+                          tile_folder, self.algorithm.id+"_tile"+str(i), tile_streams[i]))
+
+        workers = config.tile_workers if config.tile_workers > 0 else os.cpu_count()
+        workers = max(1, min(workers, len(tasks)))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_solveTile, *task) for task in tasks]
+            solutions = [f.result()[0] for f in futures]
+
+        genome = self.stitch(boxes, solutions)
+        genome_helper = self.algorithm.genome_helper
+        if genome_helper.quantized:
+            genome = genome_helper.quantize(genome)
+        self.algorithm.saveImage("stitched", genome)
+
+        if config.tile_refine_generations <= 0:
+            return genome
+
+        # global refinement starting from the stitched solution
+        refine_config: AlgorithmConfigBase = copy.copy(config)
+        refine_config.max_generation = config.tile_refine_generations
+        refine_config.max_time = -1
+        refine_config.target_solution = -1.0
+        refine_config.growth_initial_polygons = 0
+        self.algorithm.config = refine_config
+        self.algorithm.seedSolutions([genome])
+        try:
+            return self.algorithm.executive()
+        finally:
+            self.algorithm.config = config
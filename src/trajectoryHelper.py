@@ -0,0 +1,84 @@
+import os
+import numpy as np
+
+# file layout: 16 bytes header (magic, number of genes, polygon size) followed by
+# fixed-width float32 rows [generation, fitness, gene_0, ..., gene_n-1]
+TRAJECTORY_MAGIC = b"GAMLTRJ1"
+TRAJECTORY_HEADER_SIZE = 16
+
+
+class TrajectoryWriter:
+    def __init__(self, filename: str, num_params: int, polygon_size: int):
+        """
+        Initializes an append-only binary file of best solutions
+        :param filename: the path of the trajectory file, it is overwritten
+        :param num_params: the number of genes of a solution
+        :param polygon_size: the number of vertices on the polygons
+        """
+        self.filename = filename
+        self.num_params = num_params
+        self.__file = open(filename, 'wb')
+        self.__file.write(TRAJECTORY_MAGIC)
+        self.__file.write(np.array([num_params, polygon_size], np.uint32).tobytes())
+        self.__file.flush()
+
+    @property
+    def isOpened(self):
+        return self.__file != None
+
+    def append(self, generation: int, fitness: float, polygonData):
+        """appends a row, polygonData is float polygon data (see GenomeHelper.dequantize)"""
+        row = np.empty(self.num_params + 2, np.float32)
+        row[0] = generation
+        row[1] = fitness
+        row[2:] = polygonData
+        self.__file.write(row.tobytes())
+        self.__file.flush()
+
+    def close(self):
+        self.__file.close()
+        self.__file = None
+
+
+class TrajectoryReader:
+    def __init__(self, filename: str):
+        """
+        Opens a trajectory file as a read-only memory map, rows are read on demand
+        :param filename: the path of the trajectory file
+        """
+        with open(filename, 'rb') as f:
+            header = f.read(TRAJECTORY_HEADER_SIZE)
+        if header[:8] != TRAJECTORY_MAGIC:
+            raise Exception("Not a trajectory file")
+        self.num_params, self.polygon_size = [
+            int(x) for x in np.frombuffer(header[8:], np.uint32)]
+
+        width = self.num_params + 2
+        rows = (os.path.getsize(filename) - TRAJECTORY_HEADER_SIZE) // (width * 4)
+        if rows > 0:
+            self.__data = np.memmap(filename, np.float32, 'r',
+                                    offset=TRAJECTORY_HEADER_SIZE, shape=(rows, width))
+        else:
+            self.__data = np.zeros((0, width), np.float32)
+
+    def __len__(self):
+        return self.__data.shape[0]
+
+    @property
+    def generations(self) -> np.ndarray:
+        return self.__data[:, 0].astype(np.int64)
+
+    @property
+    def fitness(self) -> np.ndarray:
+        return np.array(self.__data[:, 1])
+
+    def find(self, generation: int) -> int:
+        """returns the index of the row holding the best solution at the given generation"""
+        idx = int(np.searchsorted(self.generations, generation, side='right')) - 1
+        if idx < 0:
+            raise Exception("No solution saved at or before generation "+str(generation))
+        return idx
+
+    def genome(self, index: int) -> list:
+        """returns the polygon data of a row"""
+        return self.__data[index, 2:].astype(np.float64).tolist()
@@ -0,0 +1,108 @@
+import sys
+import getopt
+import os
+from configparser import ConfigParser
+from importlib import import_module
+from racingTuner import ParameterSpace, RacingTuner
+from rngHelper import RandomStreams
+
+
+def main(argc, argv):
+    opts, args = getopt.getopt(argv, "d:a:o:i:c:p:n:b:f:w:s:", [
+        "image_folder=",
+        "algorithm=",
+        "output_folder=",
+        "config_file=",
+        "custom_params=",
+        "parameters=",
+        "configurations=",
+        "max_experiments=",
+        "first_test=",
+        "workers=",
+        "seed=",
+        "alpha=",
+        "checkpoints="
+    ])
+
+    IMAGE_FOLDER = "./images"
+    ALGORITHM_NAME = None
+    OUTPUT_FOLDER = None
+    CONFIG_FILE = None
+    CUSTOM_PARMS = None
+    PARAMETERS = None
+    CONFIGURATIONS = 20
+    MAX_EXPERIMENTS = 200
+    FIRST_TEST = 3
+    WORKERS = 0
+    SEED_VALUE = None
+    ALPHA = 0.05
+    CHECKPOINTS = 4
+
+    for opt, arg in opts:
+        if opt in ("-d", "--image_folder"):
+            IMAGE_FOLDER = arg
+        elif opt in ("-a", "--algorithm"):
+            ALGORITHM_NAME = arg
+        elif opt in ("-o", "--output_folder"):
+            OUTPUT_FOLDER = arg
+        elif opt in ("-i", "--config_file"):
+            CONFIG_FILE = arg
+        elif opt in ("-c", "--custom_params"):
+            CUSTOM_PARMS = arg
+        elif opt in ("-p", "--parameters"):
+            PARAMETERS = arg
+        elif opt in ("-n", "--configurations"):
+            CONFIGURATIONS = int(arg)
+        elif opt in ("-b", "--max_experiments"):
+            MAX_EXPERIMENTS = int(arg)
+        elif opt in ("-f", "--first_test"):
+            FIRST_TEST = int(arg)
+        elif opt in ("-w", "--workers"):
+            WORKERS = int(arg)
+        elif opt in ("-s", "--seed"):
+            SEED_VALUE = int(arg)
+        elif opt == "--alpha":
+            ALPHA = float(arg)
+        elif opt == "--checkpoints":
+            CHECKPOINTS = int(arg)
+
+    if ALGORITHM_NAME == None:
+        raise Exception("I don't know which algorithm I have to tune!")
+
+    if OUTPUT_FOLDER == None:
+        raise Exception("I don't know where I have to save the results!")
+
+    if PARAMETERS == None:
+        raise Exception("I don't know which parameters I have to tune!")
+
+    # the fixed parameters, as in main.py
+    config = ConfigParser()
+    if CONFIG_FILE != None and os.path.exists(CONFIG_FILE):
+        config.read(CONFIG_FILE)
+    if CUSTOM_PARMS != None:
+        for cmd in CUSTOM_PARMS.split(' '):
+            s = cmd.split('=')
+            config.set("DEFAULT", s[0], s[1])
+
+    algorithm_module = import_module(ALGORITHM_NAME)
+    space = ParameterSpace(getattr(algorithm_module, ALGORITHM_NAME+"Config"), PARAMETERS)
+    images = [os.path.abspath(os.path.join(IMAGE_FOLDER, f)) for f in sorted(os.listdir(IMAGE_FOLDER))]
+
+    os.makedirs(OUTPUT_FOLDER, exist_ok=True)
+    tuner = RacingTuner(ALGORITHM_NAME, space, images, OUTPUT_FOLDER, dict(config['DEFAULT']),
+                        RandomStreams(SEED_VALUE),
+                        configurations=CONFIGURATIONS,
+                        max_experiments=MAX_EXPERIMENTS,
+                        first_test=FIRST_TEST,
+                        alpha=ALPHA,
+                        checkpoints=CHECKPOINTS,
+                        workers=WORKERS)
+    best, elites = tuner.executive()
+    with open(os.path.join(OUTPUT_FOLDER, "race.txt"), 'w') as f:
+        f.write(tuner.toString())
+    print(ParameterSpace.toString(best))
+
+
+if __name__ == "__main__":
+    v = sys.argv[1:]
+    main(len(v), v)
@@ -0,0 +1,31 @@
+import os
+from configparser import ConfigParser
+import numpy as np
+import pytest
+from DE import DE, DEConfig
+
+IMAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "images", "Mona_Lisa_head.png")
+
+
+@pytest.mark.parametrize("mode", ["float", "int"])
+def test_activated_polygons_can_become_visible(tmp_path, mode):
+    config = ConfigParser()
+    config.read_dict({"DEFAULT": {"number_of_polygon": "4", "growth_initial_polygons": "1",
+                                  "genome_mode": mode, "verbose": "false"}})
+    algorithm = DE(DEConfig(config), IMAGE, str(tmp_path), "test")
+    genome_helper = algorithm.genome_helper
+    batch = algorithm.randomBatch(8)
+    fitness = np.array(algorithm.evaluateBatch(list(batch)))
+    population = genome_helper.toUnit(batch)
+    active = genome_helper.activeParams
+    best = int(np.argmin(fitness))
+    best_row = population[best].copy()
+
+    genome_helper.activePolygons = genome_helper.numberOfPolygon
+    algorithm.activate(population, fitness, active)
+
+    # the alpha genes of the activated polygons have a spread the difference vectors can use
+    alpha = population[:, genome_helper.chunkSize-1::genome_helper.chunkSize][:, 1:]
+    assert np.all(alpha.std(axis=0) > 0)
+    np.testing.assert_array_equal(population[best], best_row)
+    np.testing.assert_allclose(fitness, algorithm.evaluateBatch(list(genome_helper.fromUnit(population))))
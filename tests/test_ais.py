@@ -0,0 +1,53 @@
+import os
+from configparser import ConfigParser
+import numpy as np
+import pytest
+from AIS import AIS, AISConfig, normalize_affinity
+
+IMAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "images", "Mona_Lisa_head.png")
+
+
+@pytest.fixture
+def ais(tmp_path):
+    config = ConfigParser()
+    config.read_dict({"DEFAULT": {"number_of_polygon": "2", "verbose": "false"}})
+    return AIS(AISConfig(config), IMAGE, str(tmp_path), "test")
+
+
+def test_normalize_affinity_empty():
+    assert normalize_affinity(np.zeros(0)).size == 0
+
+
+def test_normalize_affinity_equal():
+    np.testing.assert_array_equal(normalize_affinity(np.full(4, -3.0)), np.zeros(4))
+
+
+def test_normalize_affinity_range():
+    np.testing.assert_allclose(normalize_affinity(np.array([-4.0, -2.0, 0.0])), [0.0, 0.5, 1.0])
+
+
+def test_clone_equal_affinities_one_clone_each(ais):
+    antibodies = ais.random_antibodies_fcn(3)
+    clones, affinity = ais.clone_antibodies_fcn(antibodies, np.full(3, -1.0), 0.1)
+    np.testing.assert_array_equal(clones, antibodies)
+    np.testing.assert_array_equal(affinity, np.full(3, -1.0))
+
+
+def test_clone_rate_zero_is_empty(ais):
+    antibodies = ais.random_antibodies_fcn(3)
+    clones, affinity = ais.clone_antibodies_fcn(antibodies, np.array([-3.0, -2.0, -1.0]), 0.0)
+    assert len(clones) == 0 and len(affinity) == 0
+
+
+def test_mutation_of_empty_clone_set(ais):
+    clones = ais.random_antibodies_fcn(0)
+    dirty = ais.mutation_fcn(clones, np.zeros(0), 0.4)
+    assert dirty.shape == (0,)
+
+
+def test_mutation_marks_changed_clones(ais):
+    clones = ais.random_antibodies_fcn(5)
+    before = clones.copy()
+    dirty = ais.mutation_fcn(clones, np.array([-5.0, -4.0, -3.0, -2.0, -1.0]), 0.4)
+    assert dirty.shape == (5,)
+    np.testing.assert_array_equal(dirty, np.any(clones != before, axis=1))
@@ -0,0 +1,16 @@
+import os
+from configparser import ConfigParser
+import pytest
+from GA import GA, GAConfig
+
+IMAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "images", "Mona_Lisa_head.png")
+
+
+@pytest.mark.parametrize("fast_render", ["true", "false"])
+def test_save_result_returns_the_optimized_objective(tmp_path, fast_render):
+    config = ConfigParser()
+    config.read_dict({"DEFAULT": {"number_of_polygon": "10", "fast_render": fast_render, "verbose": "false"}})
+    algorithm = GA(GAConfig(config), IMAGE, str(tmp_path), "test")
+    solution = algorithm.randomSolution()
+    assert algorithm.saveResult("final_result", solution) == algorithm.objectiveFunction(solution)
+    assert os.path.exists(os.path.join(str(tmp_path), "results", "final_result_metrics.txt"))
@@ -0,0 +1,43 @@
+import pytest
+from dynamicParamaters import readDynamicLog, fitSchedule
+
+
+def writeLog(path, lines):
+    path.write_text("".join("\t".join(str(v) for v in line)+"\n" for line in lines))
+    return str(path)
+
+
+def test_read_log_with_header(tmp_path):
+    log = writeLog(tmp_path / "dynamic_log.txt", [
+        ("value", "mutpb", "cxpb", "coeff"),
+        (10.0, 0.2, 0.9, None),
+        (9.0, 0.3, 0.8, -1.0),
+        (8.0, 0.4, 0.7, -0.5),
+    ])
+    assert readDynamicLog(log, ["cxpb", "mutpb", "population"]) == [[0.8, 0.3, None], [0.7, 0.4, None]]
+
+
+def test_read_log_without_header(tmp_path):
+    log = writeLog(tmp_path / "dynamic_log.txt", [
+        (10.0, 0.9, 0.2, None),
+        (9.0, 0.8, 0.3, -1.0),
+    ])
+    assert readDynamicLog(log, ["cxpb", "mutpb", "population"]) == [[0.8, 0.3, None]]
+
+
+def test_fit_schedule_median_and_missing():
+    logs = [
+        [[0.1, None], [0.2, None], [0.3, None]],
+        [[0.3, 100.0], [0.4, 120.0]],
+        [[0.2, 50.0]],
+    ]
+    schedule = fitSchedule(logs, 5)
+    assert len(schedule) == 3
+    assert schedule[0] == [0.2, 75.0]
+    assert schedule[1] == [pytest.approx(0.3), 120.0]
+    assert schedule[2] == [0.3, None]
+
+
+def test_fit_schedule_length():
+    assert fitSchedule([[[1.0]] * 10], 4) == [[1.0]] * 4
+    assert fitSchedule([], 4) == []
@@ -0,0 +1,32 @@
+import numpy as np
+from genomeHelper import GenomeHelper, GENOME_MODE_FLOAT, GENOME_MODE_INT
+
+
+def genomeHelper(mode):
+    return GenomeHelper(40, 30, 3, 5, mode, np.random.default_rng(0))
+
+
+def test_unit_round_trip_int():
+    helper = genomeHelper(GENOME_MODE_INT)
+    batch = helper.randomBatch(20)
+    batch[0] = helper.upper
+    batch[1] = 0
+    unit = helper.toUnit(batch)
+    assert unit.min() >= 0.0 and unit.max() <= 1.0
+    np.testing.assert_array_equal(helper.fromUnit(unit), batch)
+
+
+def test_unit_round_trip_float():
+    helper = genomeHelper(GENOME_MODE_FLOAT)
+    batch = helper.randomBatch(20)
+    np.testing.assert_array_equal(helper.fromUnit(helper.toUnit(batch)), batch)
+
+
+def test_from_unit_clips():
+    for mode in (GENOME_MODE_FLOAT, GENOME_MODE_INT):
+        helper = genomeHelper(mode)
+        data = np.full((2, helper.numOfParams), 2.0)
+        data[1] = -1.0
+        batch = helper.fromUnit(data)
+        np.testing.assert_array_equal(batch[0], helper.upper if helper.quantized else 1.0)
+        np.testing.assert_array_equal(batch[1], 0)
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+from GA import GAConfig
+from racingTuner import ParameterSpace, RacingTuner
+
+pytest.importorskip("scipy")
+
+
+def test_sample_bounds():
+    space = ParameterSpace(GAConfig, "population_size=10:20 prob_crossover=0.1:0.9 crowding_factor=0.001:0.1:log "
+                                     "init_strategy=uniform,lhs")
+    for configuration in space.sample(200, np.random.default_rng(1)):
+        assert 10 <= int(configuration["population_size"]) <= 20
+        assert 0.1 <= float(configuration["prob_crossover"]) <= 0.9
+        assert 0.001 <= float(configuration["crowding_factor"]) <= 0.1
+        assert configuration["init_strategy"] in ("uniform", "lhs")
+
+
+def test_unknown_parameter():
+    with pytest.raises(Exception):
+        ParameterSpace(GAConfig, "not_a_parameter=1:2")
+
+
+def tuner(checkpoints=4):
+    return RacingTuner("GA", None, ["image.png"], "", {}, None, checkpoints=checkpoints)
+
+
+def test_checkpoints_of_a_run_are_one_block():
+    # the same ordering at every checkpoint of two instances is not enough to drop anyone
+    results = {(c, j): [10.0 - k + c for k in range(4)] for c in range(3) for j in range(2)}
+    race = tuner()
+    assert race.ranks([0, 1, 2], results, 2).shape == (2, 3)
+    assert race.test([0, 1, 2], results, 2) == [0, 1, 2]
+
+
+def test_consistent_loser_is_dropped():
+    results = {(c, j): [float(c)] * 4 for c in range(3) for j in range(8)}
+    assert tuner().test([0, 1, 2], results, 8) == [0]
@@ -0,0 +1,24 @@
+import numpy as np
+from referenceCache import ReferenceCache
+
+
+def test_hit_and_miss(tmp_path):
+    image = tmp_path / "image.png"
+    image.write_bytes(b"reference")
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return np.arange(6, dtype=np.float32).reshape(2, 3)
+
+    cache = ReferenceCache(str(tmp_path / "cache"), str(image))
+    first = cache.array("rgb", compute)
+    second = cache.array("rgb", compute)
+    assert (cache.misses, cache.hits, len(calls)) == (1, 1, 1)
+    np.testing.assert_array_equal(first, second)
+    assert isinstance(second, np.memmap) and not second.flags.writeable
+
+    # a new cache on the same content shares the folder, a different content does not
+    assert ReferenceCache(str(tmp_path / "cache"), str(image)).folder == cache.folder
+    image.write_bytes(b"another reference")
+    assert ReferenceCache(str(tmp_path / "cache"), str(image)).folder != cache.folder
@@ -0,0 +1,47 @@
+from types import SimpleNamespace
+import pytest
+from tileSolver import TileSolver
+
+
+def tileSolver(number_of_polygon, polygon_size=3, rows=2, cols=2):
+    config = SimpleNamespace(number_of_polygon=number_of_polygon, polygon_size=polygon_size,
+                             tile_rows=rows, tile_cols=cols, tile_overlap=0.1)
+    algorithm = SimpleNamespace(config=config, image_helper=SimpleNamespace(width=40, height=30),
+                                num_of_params=number_of_polygon * (polygon_size * 2 + 4))
+    return TileSolver(algorithm, "GA")
+
+
+@pytest.mark.parametrize("number_of_polygon,expected", [(3, [1, 1, 1, 0]), (10, [3, 3, 2, 2]), (100, [25] * 4)])
+def test_shares_are_exact(number_of_polygon, expected):
+    assert tileSolver(number_of_polygon).shares(4) == expected
+
+
+def test_stitch_length_with_fewer_polygons_than_tiles():
+    solver = tileSolver(3)
+    boxes = solver.tiles()
+    solutions = [[0.5] * (share * solver.chunkSize) for share in solver.shares(len(boxes))]
+    genome = solver.stitch(boxes, solutions)
+    assert len(genome) == solver.algorithm.num_of_params
+
+
+def test_stitch_pads_missing_polygons():
+    solver = tileSolver(10)
+    boxes = solver.tiles()
+    genome = solver.stitch(boxes, [[0.5] * solver.chunkSize for _ in boxes])
+    assert len(genome) == solver.algorithm.num_of_params
+    assert genome[4 * solver.chunkSize:] == [0.0] * (6 * solver.chunkSize)
+
+
+def test_stitch_maps_vertices_to_the_image():
+    solver = tileSolver(4, polygon_size=1, rows=1, cols=2)
+    solver.config.tile_overlap = 0.0
+    boxes = solver.tiles()
+    genome = solver.stitch(boxes, [[0.5] * solver.chunkSize for _ in boxes])
+    assert genome[:2] == [0.25, 0.5] and genome[solver.chunkSize:solver.chunkSize + 2] == [0.75, 0.5]
+
+
+def test_stitch_rejects_longer_solutions():
+    solver = tileSolver(3)
+    boxes = solver.tiles()
+    with pytest.raises(Exception):
+        solver.stitch(boxes, [[0.5] * solver.chunkSize for _ in boxes])